@@ -4,6 +4,7 @@
 # dependencies = [
 #   "tree-sitter>=0.23.0",
 #   "tree-sitter-go>=0.23.0",
+#   "orjson>=3.9.0",
 # ]
 # ///
 """
@@ -14,21 +15,118 @@ Detects: reflection, over-mocking, missing assertions, global state.
 This script uses tree-sitter for accurate scope-aware analysis, ensuring
 assertions are counted only in test code, not in comments or strings.
 """
+import heapq
 import sys
 import re
+from collections import defaultdict
+from itertools import count
+from operator import itemgetter
 from pathlib import Path
-from tree_sitter import Query
+from tree_sitter import Node, Query, QueryCursor
 
 # Import shared utilities (local module)
 sys.path.insert(0, str(Path(__file__).parent))
 from test_quality_common import (
-    Issue, TestFunction, parse_go_file, find_test_functions, find_test_files,
-    find_function_calls, has_pattern_in_scope, find_defer_statements,
-    get_code_snippet, get_node_text, build_json_output, relative_path, GO_LANGUAGE
+    Issue, TestFunction, get_parsed, find_test_functions, find_test_files_cached,
+    TEST_FUNC_MARKERS, lazy_code_snippet, get_node_text, write_json_output, relative_path,
+    GO_LANGUAGE,
+    parse_args, analyze_files
 )
 
 
-def check_reflection_usage(test_func: TestFunction, project_root: Path) -> list[Issue]:
+# Queries are compiled once at import; compiling them per test function is
+# one of the more expensive tree-sitter operations.
+
+# Every call/statement the anti-pattern checks look at, matched in a single
+# pass over the test body. Checks consume the bucket for their capture name.
+_ANTIPATTERNS_QUERY = Query(GO_LANGUAGE, """
+[
+  (call_expression
+    function: (selector_expression
+      operand: (identifier) @reflect.pkg
+      field: (field_identifier) @reflect.method
+    )
+    (#eq? @reflect.pkg "reflect")
+    (#match? @reflect.method "^(ValueOf|TypeOf)$")
+  ) @reflection
+  (call_expression
+    function: (selector_expression
+      operand: (identifier) @unsafe.pkg
+      field: (field_identifier) @unsafe.method
+    )
+    (#eq? @unsafe.pkg "unsafe")
+    (#eq? @unsafe.method "Pointer")
+  ) @reflection
+  (call_expression
+    function: (selector_expression
+      field: (field_identifier) @access.method
+    )
+    (#match? @access.method "^(Elem|FieldByName)$")
+  ) @reflection.access
+  (call_expression
+    function: (selector_expression
+      operand: (identifier) @setenv.pkg
+      field: (field_identifier) @setenv.method
+    )
+    (#eq? @setenv.pkg "os")
+    (#eq? @setenv.method "Setenv")
+  ) @os.setenv
+  (call_expression
+    function: (selector_expression
+      operand: (identifier) @t.pkg
+      field: (field_identifier) @t.method
+    )
+    (#eq? @t.pkg "t")
+    (#eq? @t.method "Setenv")
+  ) @t.setenv
+  (call_expression
+    function: (selector_expression
+      operand: (identifier) @skip.pkg
+      field: (field_identifier) @skip.method
+    )
+    (#eq? @skip.pkg "t")
+    (#match? @skip.method "^Skip")
+  ) @t.skip
+  (call_expression
+    function: (selector_expression
+      operand: (identifier) @assert.pkg
+      field: (field_identifier)
+    )
+    (#match? @assert.pkg "^(assert|require)$")
+  ) @assertion
+  (call_expression
+    function: (selector_expression
+      operand: (identifier) @t_assert.pkg
+      field: (field_identifier) @t_assert.method
+    )
+    (#eq? @t_assert.pkg "t")
+    (#match? @t_assert.method "^(Error|Fatal|Errorf|Fatalf)$")
+  ) @t_assertion
+  (defer_statement
+    (call_expression)
+  ) @defer
+  (assignment_statement
+    left: (expression_list
+      (identifier) @var
+    )
+    (#match? @var "^[A-Z][A-Z_]+$")
+  ) @assignment
+]
+""")
+
+Captures = dict[str, list[Node]]
+
+# Maximum issues reported per pattern (matching bash behavior)
+PATTERN_LIMITS = {
+    "global state": 20,
+    "no assertions": 30,
+}
+
+# Deferred calls that count as environment cleanup
+_CLEANUP_RE = re.compile(rb'Unsetenv|Setenv|Cleanup')
+
+
+def check_reflection_usage(test_func: TestFunction, captures: Captures, rel_path: str) -> list[Issue]:
     """
     Detect reflection accessing unexported fields (HIGH).
 
@@ -36,99 +134,41 @@ def check_reflection_usage(test_func: TestFunction, project_root: Path) -> list[
     """
     issues = []
 
-    # Check for reflect.ValueOf and reflect.TypeOf
-    reflection_patterns = [
-        ("reflect", "ValueOf"),
-        ("reflect", "TypeOf"),
-        ("unsafe", "Pointer"),
-    ]
-
-    for package, method in reflection_patterns:
-        calls = find_function_calls(
-            test_func.body_node,
-            test_func.source_bytes,
-            package_pattern=package,
-            method_pattern=method
-        )
-
-        for call_node, pkg, meth in calls:
+    # reflect.ValueOf, reflect.TypeOf and unsafe.Pointer report the full
+    # qualified name; .Elem() and .FieldByName() (on any object) only the method
+    for capture_name in ("reflection", "reflection.access"):
+        for call_node in captures.get(capture_name, []):
+            selector = call_node.child_by_field_name("function")
+            if capture_name == "reflection":
+                pattern = get_node_text(selector, test_func.source_bytes)
+            else:
+                pattern = "." + get_node_text(selector.child_by_field_name("field"), test_func.source_bytes)
+
             issues.append(Issue(
-                file=relative_path(test_func.filepath, project_root),
+                file=rel_path,
                 line=call_node.start_point[0] + 1,
                 test_name=test_func.name,
                 issue="Using reflection to access unexported fields couples test to implementation",
                 category="Anti-Patterns",
                 severity="High",
-                pattern=f"{pkg}.{meth}",
-                code_snippet=get_code_snippet(call_node, test_func.source_bytes),
+                pattern=pattern,
+                code_snippet=lazy_code_snippet(call_node, test_func.source_bytes),
                 suggestion="Test the public API only. If internal behavior needs testing, consider extracting it to a separate exported function or using test-only accessors"
             ))
 
-    # Check for .Elem() and .FieldByName() method calls (on any object)
-    elem_fieldbyname_patterns = ["Elem", "FieldByName", "SetString", "Set"]
-
-    for method in elem_fieldbyname_patterns:
-        # Find all method calls matching this pattern
-        calls = find_function_calls(
-            test_func.body_node,
-            test_func.source_bytes,
-            package_pattern=".*",
-            method_pattern=method
-        )
-
-        for call_node, pkg, meth in calls:
-            # Only report if it's likely reflection (not a common method name)
-            if method in ["Elem", "FieldByName"]:
-                issues.append(Issue(
-                    file=relative_path(test_func.filepath, project_root),
-                    line=call_node.start_point[0] + 1,
-                    test_name=test_func.name,
-                    issue="Using reflection to access unexported fields couples test to implementation",
-                    category="Anti-Patterns",
-                    severity="High",
-                    pattern=f".{meth}",
-                    code_snippet=get_code_snippet(call_node, test_func.source_bytes),
-                    suggestion="Test the public API only. If internal behavior needs testing, consider extracting it to a separate exported function or using test-only accessors"
-                ))
-
     return issues
 
 
-def count_assertions(body_node, source_bytes: bytes) -> int:
+def count_assertions(captures: Captures) -> int:
     """
-    Count assert.* and require.* calls in test scope.
+    Count assert.*, require.* and t.Error/t.Fatal calls in test scope.
 
     Uses AST parsing to count only actual calls, not comments or strings.
     """
-    assertion_query = Query(GO_LANGUAGE, """
-    (call_expression
-      function: (selector_expression
-        operand: (identifier) @obj
-        field: (field_identifier)
-      )
-      (#match? @obj "^(assert|require)$")
-    ) @assertion
-    """)
-
-    # Also count t.Error, t.Fatal, t.Errorf, t.Fatalf
-    t_assertion_query = Query(GO_LANGUAGE, """
-    (call_expression
-      function: (selector_expression
-        operand: (identifier) @obj
-        field: (field_identifier) @method
-      )
-      (#eq? @obj "t")
-      (#match? @method "^(Error|Fatal|Errorf|Fatalf)$")
-    ) @t_assertion
-    """)
-
-    assertion_count = len(assertion_query.captures(body_node))
-    t_assertion_count = len(t_assertion_query.captures(body_node))
-
-    return assertion_count + t_assertion_count
-
-
-def check_assertion_count(test_func: TestFunction, project_root: Path) -> list[Issue]:
+    return len(captures.get("assertion", [])) + len(captures.get("t_assertion", []))
+
+
+def check_assertion_count(test_func: TestFunction, assertion_count: int, rel_path: str) -> list[Issue]:
     """
     Detect >5 assertions per test (MEDIUM).
 
@@ -136,11 +176,9 @@ def check_assertion_count(test_func: TestFunction, project_root: Path) -> list[I
     """
     issues = []
 
-    assertion_count = count_assertions(test_func.body_node, test_func.source_bytes)
-
     if assertion_count > 5:
         issues.append(Issue(
-            file=relative_path(test_func.filepath, project_root),
+            file=rel_path,
             line=test_func.start_line,
             test_name=test_func.name,
             issue=f"Test has {assertion_count} assertions (>5 suggests testing multiple behaviors)",
@@ -155,7 +193,7 @@ def check_assertion_count(test_func: TestFunction, project_root: Path) -> list[I
     return issues
 
 
-def check_missing_cleanup(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_missing_cleanup(test_func: TestFunction, captures: Captures, rel_path: str) -> list[Issue]:
     """
     Detect os.Setenv without cleanup (MEDIUM).
 
@@ -163,54 +201,40 @@ def check_missing_cleanup(test_func: TestFunction, project_root: Path) -> list[I
     """
     issues = []
 
-    # Find os.Setenv calls
-    setenv_calls = find_function_calls(
-        test_func.body_node,
-        test_func.source_bytes,
-        package_pattern="os",
-        method_pattern="Setenv"
-    )
-
-    # Check for t.Setenv (new Go 1.17+ API, which is OK)
-    t_setenv_calls = find_function_calls(
-        test_func.body_node,
-        test_func.source_bytes,
-        package_pattern="t",
-        method_pattern="Setenv"
-    )
+    setenv_calls = captures.get("os.setenv", [])
+    if not setenv_calls:
+        return issues
 
-    # If using t.Setenv, no issues
-    if t_setenv_calls:
+    # If using t.Setenv (new Go 1.17+ API, which is OK), no issues
+    if captures.get("t.setenv"):
         return issues
 
     # Check if defer cleanup exists
-    defer_nodes = find_defer_statements(test_func.body_node)
     has_cleanup = False
 
-    for defer_node in defer_nodes:
-        defer_text = get_node_text(defer_node, test_func.source_bytes)
-        if re.search(r'(Unsetenv|Setenv|Cleanup)', defer_text):
+    for defer_node in captures.get("defer", []):
+        if _CLEANUP_RE.search(test_func.source_bytes, defer_node.start_byte, defer_node.end_byte):
             has_cleanup = True
             break
 
     if not has_cleanup:
-        for call_node, pkg, meth in setenv_calls:
+        for call_node in setenv_calls:
             issues.append(Issue(
-                file=relative_path(test_func.filepath, project_root),
+                file=rel_path,
                 line=call_node.start_point[0] + 1,
                 test_name=test_func.name,
                 issue="os.Setenv without cleanup can pollute test environment",
                 category="Anti-Patterns",
                 severity="Medium",
                 pattern="os.Setenv",
-                code_snippet=get_code_snippet(call_node, test_func.source_bytes),
+                code_snippet=lazy_code_snippet(call_node, test_func.source_bytes),
                 suggestion='Use t.Setenv() (Go 1.17+) which automatically cleans up, or add: defer os.Unsetenv("VAR_NAME")'
             ))
 
     return issues
 
 
-def check_global_state(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_global_state(test_func: TestFunction, captures: Captures, rel_path: str) -> list[Issue]:
     """
     Detect global/package-level variable modifications (MEDIUM).
 
@@ -219,42 +243,36 @@ def check_global_state(test_func: TestFunction, project_root: Path) -> list[Issu
     """
     issues = []
 
-    # Query for assignment statements
-    assignment_query = Query(GO_LANGUAGE, """
-    (assignment_statement
-      left: (expression_list
-        (identifier) @var
-      )
-    ) @assignment
-    """)
-
-    assignments = assignment_query.captures(test_func.body_node)
-
-    for node, capture_name in assignments[:20]:  # Limit to 20 like bash version
-        if capture_name == "var":
-            var_name = get_node_text(node, test_func.source_bytes)
-
-            # Check if variable looks global (all caps or common global patterns)
-            if re.match(r'^[A-Z][A-Z_]+$', var_name):
-                parent = node.parent
-                if parent:
-                    issues.append(Issue(
-                        file=relative_path(test_func.filepath, project_root),
-                        line=parent.start_point[0] + 1,
-                        test_name=test_func.name,
-                        issue="Modifying package-level variable can cause test interdependencies",
-                        category="Anti-Patterns",
-                        severity="Medium",
-                        pattern="global state",
-                        code_snippet=get_code_snippet(parent, test_func.source_bytes),
-                        suggestion="Use test-scoped variables or pass state through function parameters. If global state is necessary, ensure proper cleanup with defer or t.Cleanup()"
-                    ))
-                    break  # Only report once per test
+    # The query only captures variables that look global (all caps), so
+    # the first one in the test is the one to report
+    global_vars = captures.get("var")
+    if not global_vars:
+        return issues
+
+    node = min(global_vars, key=lambda n: n.start_byte)
+    parent = node.parent
+    if parent:
+        issues.append(Issue(
+            file=rel_path,
+            line=parent.start_point[0] + 1,
+            test_name=test_func.name,
+            issue="Modifying package-level variable can cause test interdependencies",
+            category="Anti-Patterns",
+            severity="Medium",
+            pattern="global state",
+            code_snippet=lazy_code_snippet(parent, test_func.source_bytes),
+            suggestion="Use test-scoped variables or pass state through function parameters. If global state is necessary, ensure proper cleanup with defer or t.Cleanup()"
+        ))
 
     return issues
 
 
-def check_missing_assertions(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_missing_assertions(
+    test_func: TestFunction,
+    captures: Captures,
+    assertion_count: int,
+    rel_path: str
+) -> list[Issue]:
     """
     Detect tests with no assertions (MEDIUM).
 
@@ -266,59 +284,50 @@ def check_missing_assertions(test_func: TestFunction, project_root: Path) -> lis
     if test_func.name.startswith("Benchmark"):
         return issues
 
-    # Check for assertions
-    assertion_count = count_assertions(test_func.body_node, test_func.source_bytes)
-
-    if assertion_count == 0:
-        # Check for t.Skip
-        has_skip = has_pattern_in_scope(
-            test_func.body_node,
-            test_func.source_bytes,
-            package_pattern="t",
-            method_pattern="Skip.*"
-        )
-
-        if not has_skip:
-            issues.append(Issue(
-                file=relative_path(test_func.filepath, project_root),
-                line=test_func.start_line,
-                test_name=test_func.name,
-                issue="Test function has no assertions (may be incomplete or not actually testing)",
-                category="Anti-Patterns",
-                severity="Medium",
-                pattern="no assertions",
-                code_snippet=f"func {test_func.name}",
-                suggestion="Add assertions to verify expected behavior, or add t.Skip() if the test is intentionally incomplete"
-            ))
+    # Tests with assertions or a t.Skip are fine
+    if assertion_count == 0 and not captures.get("t.skip"):
+        issues.append(Issue(
+            file=rel_path,
+            line=test_func.start_line,
+            test_name=test_func.name,
+            issue="Test function has no assertions (may be incomplete or not actually testing)",
+            category="Anti-Patterns",
+            severity="Medium",
+            pattern="no assertions",
+            code_snippet=f"func {test_func.name}",
+            suggestion="Add assertions to verify expected behavior, or add t.Skip() if the test is intentionally incomplete"
+        ))
 
     return issues
 
 
 def analyze_file(filepath: Path, project_root: Path) -> list[Issue]:
     """Analyze a single test file for anti-patterns."""
-    tree = parse_go_file(filepath)
+    tree, source_bytes = get_parsed(filepath, TEST_FUNC_MARKERS)
     if tree is None:
         return []
 
-    with open(filepath, 'rb') as f:
-        source_bytes = f.read()
-
     test_functions = find_test_functions(tree, filepath, source_bytes)
+    rel_path = relative_path(filepath, project_root)
 
     all_issues = []
     for test_func in test_functions:
-        all_issues.extend(check_reflection_usage(test_func, project_root))
-        all_issues.extend(check_assertion_count(test_func, project_root))
-        all_issues.extend(check_missing_cleanup(test_func, project_root))
-        all_issues.extend(check_global_state(test_func, project_root))
-        all_issues.extend(check_missing_assertions(test_func, project_root))
+        # One query pass per test; each check reads the captures it needs
+        captures = QueryCursor(_ANTIPATTERNS_QUERY).captures(test_func.body_node)
+        assertion_count = count_assertions(captures)
+
+        all_issues.extend(check_reflection_usage(test_func, captures, rel_path))
+        all_issues.extend(check_assertion_count(test_func, assertion_count, rel_path))
+        all_issues.extend(check_missing_cleanup(test_func, captures, rel_path))
+        all_issues.extend(check_global_state(test_func, captures, rel_path))
+        all_issues.extend(check_missing_assertions(test_func, captures, assertion_count, rel_path))
 
     return all_issues
 
 
 def main():
     """Main entry point."""
-    project_root = Path(sys.argv[1] if len(sys.argv) > 1 else ".")
+    project_root, jobs = parse_args("Check for testing anti-patterns in Go tests.")
 
     # Validate project root
     if not project_root.exists():
@@ -326,36 +335,40 @@ def main():
         sys.exit(1)
 
     # Find test files
-    test_files = find_test_files(project_root)
+    test_files = find_test_files_cached(project_root)
 
     if not test_files:
         # No test files found - output empty result
-        print(build_json_output("check-anti-patterns", []))
+        write_json_output("check-anti-patterns", [])
         return
 
-    # Analyze all test files
-    all_issues = []
-    for test_file in test_files:
-        all_issues.extend(analyze_file(test_file, project_root))
-
-    # Sort issues by file and line number
-    all_issues.sort(key=lambda i: (i.file, i.line))
-
-    # Limit global state issues to 20 (matching bash behavior)
-    global_state_issues = [i for i in all_issues if i.pattern == "global state"]
-    other_issues = [i for i in all_issues if i.pattern != "global state"]
-    all_issues = other_issues + global_state_issues[:20]
-
-    # Limit no-assertions issues to 30 (matching bash behavior)
-    no_assertion_issues = [i for i in all_issues if i.pattern == "no assertions"]
-    other_issues = [i for i in all_issues if i.pattern != "no assertions"]
-    all_issues = other_issues + no_assertion_issues[:30]
-
-    # Sort again after limiting
-    all_issues.sort(key=lambda i: (i.file, i.line))
+    # Analyze all test files in parallel; each file is independent.
+    # Issues are bucketed by pattern so capped patterns can be trimmed
+    # without filtering the full list. Ties at the same file and line keep
+    # the order they were always reported in: uncapped patterns first, then
+    # capped patterns in PATTERN_LIMITS order, each in analysis order.
+    cap_rank = {pattern: rank for rank, pattern in enumerate(PATTERN_LIMITS, 1)}
+    seq = count()
+    buckets = defaultdict(list)
+    for issues in analyze_files(analyze_file, test_files, project_root, jobs):
+        for issue in issues:
+            key = (issue.file, issue.line, cap_rank.get(issue.pattern, 0), next(seq))
+            buckets[issue.pattern].append((key, issue))
+
+    # Sort each bucket by file and line number, keeping only the first
+    # issues of capped patterns, then merge the sorted buckets
+    sorted_buckets = []
+    for pattern, entries in buckets.items():
+        limit = PATTERN_LIMITS.get(pattern)
+        if limit is None:
+            sorted_buckets.append(sorted(entries, key=itemgetter(0)))
+        else:
+            sorted_buckets.append(heapq.nsmallest(limit, entries, key=itemgetter(0)))
+
+    all_issues = [issue for _, issue in heapq.merge(*sorted_buckets, key=itemgetter(0))]
 
     # Output JSON
-    print(build_json_output("check-anti-patterns", all_issues))
+    write_json_output("check-anti-patterns", all_issues)
 
 
 if __name__ == "__main__":
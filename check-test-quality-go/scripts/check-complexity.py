@@ -4,6 +4,7 @@
 # dependencies = [
 #   "tree-sitter>=0.23.0",
 #   "tree-sitter-go>=0.23.0",
+#   "orjson>=3.9.0",
 # ]
 # ///
 """
@@ -15,19 +16,77 @@ This script uses tree-sitter for accurate AST parsing, providing exact line
 counts and eliminating false positives from counting patterns in comments.
 """
 import sys
-import re
 from pathlib import Path
-from tree_sitter import Query
+from tree_sitter import Query, QueryCursor
 
 # Import shared utilities (local module)
 sys.path.insert(0, str(Path(__file__).parent))
 from test_quality_common import (
-    Issue, TestFunction, parse_go_file, find_test_functions, find_test_files,
-    count_control_flow_statements, build_json_output, relative_path, GO_LANGUAGE
+    Issue, TestFunction, get_parsed, find_test_functions, find_test_files_cached,
+    TEST_FUNC_MARKERS, write_json_output, relative_path, GO_LANGUAGE, ISSUE_SORT_KEY,
+    parse_args, analyze_files, ERR_CHECK_RE
 )
 
 
-def check_long_functions(test_func: TestFunction, project_root: Path) -> list[Issue]:
+# Queries are compiled once at import rather than once per test function.
+
+# Everything the complexity metrics count, matched in a single pass:
+# - mock object creations: composite literals with a "Mock" type name and
+#   constructor calls such as newMockXxx()/NewMockXxx() or pkg.NewMockXxx()
+# - control flow statements (for, if, switch, select)
+_COMPLEXITY_QUERY = Query(GO_LANGUAGE, """
+[
+  (composite_literal
+    type: [
+      (type_identifier) @type
+      (pointer_type
+        (type_identifier) @type
+      )
+    ]
+    (#match? @type "^Mock")
+  ) @mock
+  (call_expression
+    function: [
+      (identifier) @func
+      (selector_expression
+        field: (field_identifier) @func
+      )
+    ]
+    (#match? @func "^(new|New)Mock")
+  ) @mock
+  (if_statement) @if
+  (for_statement) @control_flow
+  (expression_switch_statement) @control_flow
+  (type_switch_statement) @control_flow
+  (select_statement) @control_flow
+]
+""")
+
+
+def _is_ascii_digits(s: str) -> bool:
+    """Check that s is non-empty and made only of ASCII digits."""
+    return s.isascii() and s.isdigit()
+
+
+def is_generic_test_name(name: str) -> bool:
+    """
+    Check for generic test names with plain string ops.
+
+    Matches: Test, TestX, Test1, TestCase, TestCase1, TestFunc, TestFunc1, TestFoo, TestBar
+    """
+    if not name.startswith("Test"):
+        return False
+
+    suffix = name[4:]
+    if len(suffix) <= 1:
+        return suffix == "" or "A" <= suffix <= "Z" or _is_ascii_digits(suffix)
+    if suffix.startswith(("Case", "Func")):
+        rest = suffix[4:]
+        return rest == "" or _is_ascii_digits(rest)
+    return suffix in ("Foo", "Bar") or _is_ascii_digits(suffix)
+
+
+def check_long_functions(test_func: TestFunction, counts: dict[str, int], rel_path: str) -> list[Issue]:
     """
     Detect test functions >100 lines (HIGH).
 
@@ -38,15 +97,8 @@ def check_long_functions(test_func: TestFunction, project_root: Path) -> list[Is
     line_count = test_func.end_line - test_func.start_line
 
     if line_count > 100:
-        # Count additional metrics
-        mock_count = count_mock_objects(test_func.body_node, test_func.source_bytes)
-        control_flow_count = count_control_flow_statements(
-            test_func.body_node,
-            test_func.source_bytes
-        )
-
         issues.append(Issue(
-            file=relative_path(test_func.filepath, project_root),
+            file=rel_path,
             line=test_func.start_line,
             test_name=test_func.name,
             issue=f"Test function is {line_count} lines (exceeds 100-line guideline)",
@@ -57,60 +109,41 @@ def check_long_functions(test_func: TestFunction, project_root: Path) -> list[Is
             suggestion="Split into multiple focused tests, extract setup to helpers, or use table-driven tests to reduce duplication",
             metrics={
                 "total_lines": line_count,
-                "mock_count": mock_count,
-                "control_flow_statements": control_flow_count
+                "mock_count": counts["mock_count"],
+                "control_flow_statements": counts["control_flow_statements"]
             }
         ))
 
     return issues
 
 
-def count_mock_objects(body_node, source_bytes: bytes) -> int:
+def count_complexity(body_node, source_bytes: bytes) -> dict[str, int]:
     """
-    Count mock object creations in test body.
+    Count mock object creations and control flow statements in test body.
 
-    Patterns:
+    Mock patterns:
     - new(MockXxx)
     - mock := &MockXxx{}
     - NewMockXxx()
     - &MockXxx{}
+
+    Control flow excludes 'if err != nil' patterns which are idiomatic error
+    handling. Both counts come from one query pass over the body.
     """
-    # Query for composite literals with "Mock" in type name
-    composite_query = Query(GO_LANGUAGE, """
-    (composite_literal
-      type: [
-        (type_identifier) @type
-        (pointer_type
-          (type_identifier) @type
-        )
-      ]
-      (#match? @type "^Mock")
-    ) @composite
-    """)
-
-    # Query for function calls with "Mock" in name
-    call_query = Query(GO_LANGUAGE, """
-    [
-      (call_expression
-        function: (identifier) @func
-        (#match? @func "^(new|New)Mock")
-      ) @call
-      (call_expression
-        function: (selector_expression
-          field: (field_identifier) @method
-        )
-        (#match? @method "^NewMock")
-      ) @call
-    ]
-    """)
+    captures = QueryCursor(_COMPLEXITY_QUERY).captures(body_node)
 
-    composite_count = len(composite_query.captures(body_node))
-    call_count = len(call_query.captures(body_node))
+    if_count = sum(
+        1 for node in captures.get("if", [])
+        if not ERR_CHECK_RE.search(source_bytes, node.start_byte, node.end_byte)
+    )
 
-    return composite_count + call_count
+    return {
+        "mock_count": len(captures.get("mock", [])),
+        "control_flow_statements": len(captures.get("control_flow", [])) + if_count,
+    }
 
 
-def check_excessive_mocks(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_excessive_mocks(test_func: TestFunction, counts: dict[str, int], rel_path: str) -> list[Issue]:
     """
     Detect >4 mock objects per test (HIGH).
 
@@ -118,11 +151,11 @@ def check_excessive_mocks(test_func: TestFunction, project_root: Path) -> list[I
     """
     issues = []
 
-    mock_count = count_mock_objects(test_func.body_node, test_func.source_bytes)
+    mock_count = counts["mock_count"]
 
     if mock_count > 4:
         issues.append(Issue(
-            file=relative_path(test_func.filepath, project_root),
+            file=rel_path,
             line=test_func.start_line,
             test_name=test_func.name,
             issue=f"Test has {mock_count} mock objects (>4 suggests over-mocking)",
@@ -137,7 +170,7 @@ def check_excessive_mocks(test_func: TestFunction, project_root: Path) -> list[I
     return issues
 
 
-def check_complex_logic(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_complex_logic(test_func: TestFunction, counts: dict[str, int], rel_path: str) -> list[Issue]:
     """
     Detect multiple control flow statements (>3) (MEDIUM).
 
@@ -145,14 +178,11 @@ def check_complex_logic(test_func: TestFunction, project_root: Path) -> list[Iss
     """
     issues = []
 
-    control_flow_count = count_control_flow_statements(
-        test_func.body_node,
-        test_func.source_bytes
-    )
+    control_flow_count = counts["control_flow_statements"]
 
     if control_flow_count > 3:
         issues.append(Issue(
-            file=relative_path(test_func.filepath, project_root),
+            file=rel_path,
             line=test_func.start_line,
             test_name=test_func.name,
             issue=f"Test has {control_flow_count} control flow statements (>3 indicates complex logic)",
@@ -167,7 +197,7 @@ def check_complex_logic(test_func: TestFunction, project_root: Path) -> list[Iss
     return issues
 
 
-def check_test_names(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_test_names(test_func: TestFunction, rel_path: str) -> list[Issue]:
     """
     Detect generic test names (MEDIUM).
 
@@ -175,56 +205,46 @@ def check_test_names(test_func: TestFunction, project_root: Path) -> list[Issue]
     """
     issues = []
 
-    poor_patterns = [
-        r'^Test[A-Z]?$',          # TestX, Test
-        r'^Test[0-9]+$',          # Test1, Test2
-        r'^TestCase[0-9]*$',      # TestCase, TestCase1
-        r'^TestFunc[0-9]*$',      # TestFunc, TestFunc1
-        r'^Test(Foo|Bar)$',       # TestFoo, TestBar
-    ]
-
-    for pattern in poor_patterns:
-        if re.match(pattern, test_func.name):
-            issues.append(Issue(
-                file=relative_path(test_func.filepath, project_root),
-                line=test_func.start_line,
-                test_name=test_func.name,
-                issue=f"Test name '{test_func.name}' is too generic and doesn't describe behavior",
-                category="Test Complexity",
-                severity="Medium",
-                pattern="complexity",
-                code_snippet=test_func.name,
-                suggestion="Use descriptive names that explain what's being tested, e.g., TestUserCreationWithInvalidEmail, TestHandlerReturns404ForMissingResource"
-            ))
-            break  # Only report once per test
+    if is_generic_test_name(test_func.name):
+        issues.append(Issue(
+            file=rel_path,
+            line=test_func.start_line,
+            test_name=test_func.name,
+            issue=f"Test name '{test_func.name}' is too generic and doesn't describe behavior",
+            category="Test Complexity",
+            severity="Medium",
+            pattern="complexity",
+            code_snippet=test_func.name,
+            suggestion="Use descriptive names that explain what's being tested, e.g., TestUserCreationWithInvalidEmail, TestHandlerReturns404ForMissingResource"
+        ))
 
     return issues
 
 
 def analyze_file(filepath: Path, project_root: Path) -> list[Issue]:
     """Analyze a single test file for complexity issues."""
-    tree = parse_go_file(filepath)
+    tree, source_bytes = get_parsed(filepath, TEST_FUNC_MARKERS)
     if tree is None:
         return []
 
-    with open(filepath, 'rb') as f:
-        source_bytes = f.read()
-
     test_functions = find_test_functions(tree, filepath, source_bytes)
+    rel_path = relative_path(filepath, project_root)
 
     all_issues = []
     for test_func in test_functions:
-        all_issues.extend(check_long_functions(test_func, project_root))
-        all_issues.extend(check_excessive_mocks(test_func, project_root))
-        all_issues.extend(check_complex_logic(test_func, project_root))
-        all_issues.extend(check_test_names(test_func, project_root))
+        counts = count_complexity(test_func.body_node, test_func.source_bytes)
+
+        all_issues.extend(check_long_functions(test_func, counts, rel_path))
+        all_issues.extend(check_excessive_mocks(test_func, counts, rel_path))
+        all_issues.extend(check_complex_logic(test_func, counts, rel_path))
+        all_issues.extend(check_test_names(test_func, rel_path))
 
     return all_issues
 
 
 def main():
     """Main entry point."""
-    project_root = Path(sys.argv[1] if len(sys.argv) > 1 else ".")
+    project_root, jobs = parse_args("Check for test complexity issues in Go tests.")
 
     # Validate project root
     if not project_root.exists():
@@ -232,23 +252,23 @@ def main():
         sys.exit(1)
 
     # Find test files
-    test_files = find_test_files(project_root)
+    test_files = find_test_files_cached(project_root)
 
     if not test_files:
         # No test files found - output empty result
-        print(build_json_output("check-complexity", []))
+        write_json_output("check-complexity", [])
         return
 
-    # Analyze all test files
+    # Analyze all test files in parallel; each file is independent
     all_issues = []
-    for test_file in test_files:
-        all_issues.extend(analyze_file(test_file, project_root))
+    for issues in analyze_files(analyze_file, test_files, project_root, jobs):
+        all_issues.extend(issues)
 
     # Sort issues by file and line number
-    all_issues.sort(key=lambda i: (i.file, i.line))
+    all_issues.sort(key=ISSUE_SORT_KEY)
 
     # Output JSON
-    print(build_json_output("check-complexity", all_issues))
+    write_json_output("check-complexity", all_issues)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@
 # dependencies = [
 #   "tree-sitter>=0.23.0",
 #   "tree-sitter-go>=0.23.0",
+#   "orjson>=3.9.0",
 # ]
 # ///
 """
@@ -15,29 +16,70 @@ randomness, time dependencies.
 This script uses tree-sitter for scope-aware analysis, checking if
 synchronization primitives exist in the same test function.
 """
+import heapq
 import sys
 import re
 from pathlib import Path
+from typing import Optional
 from tree_sitter import Query
 
 # Import shared utilities (local module)
 sys.path.insert(0, str(Path(__file__).parent))
 from test_quality_common import (
-    Issue, TestFunction, parse_go_file, find_test_functions, find_test_files,
-    find_function_calls, has_pattern_in_scope, find_goroutines,
-    get_code_snippet, build_json_output, relative_path, GO_LANGUAGE, get_node_text
+    Issue, TestFunction, get_parsed, find_test_functions, find_test_files_cached,
+    TEST_FUNC_MARKERS,
+    find_indexed_calls, has_indexed_call, CallIndex, find_goroutines,
+    lazy_code_snippet, write_json_output, relative_path, GO_LANGUAGE,
+    any_match, ISSUE_SORT_KEY,
+    parse_args, analyze_files
 )
 
 
-def has_sync_waitgroup(body_node, source_bytes: bytes) -> bool:
+# Source substrings of which at least one occurs in any file this script can
+# report on: the go keyword followed by whitespace or a parenthesis, and the
+# rand, time and context calls it checks; files without any of them are
+# skipped before parsing. go\r covers CRLF files where go ends a line.
+_TRIGGERS = (
+    b"go ", b"go\t", b"go\r", b"go\n", b"go(",
+    b"rand", b"Now", b"WithTimeout", b"After",
+)
+
+# Maximum issues reported per pattern group (matching bash behavior)
+CAP_LIMITS = {
+    "time.Now": 20,
+    "timeout": 15,
+}
+
+# Timeout patterns, searched in raw source bytes within a call's range
+_EVENTUALLY_RE = re.compile(rb'(require|assert)\.Eventually')
+_NUMERIC_TIMEOUT_RE = re.compile(rb'\d+\s*\*\s*time\.(Millisecond|Second|Minute)')
+
+# Queries are compiled once at import rather than once per test function
+
+# make(chan ...), send/receive operations
+_CHANNEL_Q = Query(GO_LANGUAGE, """
+[
+  (call_expression
+    function: (identifier) @make
+    arguments: (argument_list
+      (channel_type)
+    )
+    (#eq? @make "make")
+  ) @make_chan
+  (send_statement) @send
+  (receive_statement) @receive
+]
+""")
+
+def has_sync_waitgroup(calls: CallIndex) -> bool:
     """Check if test uses sync.WaitGroup."""
     # Check for sync.WaitGroup type or .Wait()/.Add()/.Done() calls
-    has_waitgroup_type = has_pattern_in_scope(
-        body_node, source_bytes, package_pattern="sync", method_pattern="WaitGroup"
+    has_waitgroup_type = has_indexed_call(
+        calls, package_pattern="sync", method_pattern="WaitGroup"
     )
 
-    has_wait_calls = has_pattern_in_scope(
-        body_node, source_bytes, package_pattern=".*", method_pattern="(Wait|Add|Done)"
+    has_wait_calls = has_indexed_call(
+        calls, package_pattern=".*", method_pattern="(Wait|Add|Done)"
     )
 
     return has_waitgroup_type or has_wait_calls
@@ -45,25 +87,10 @@ def has_sync_waitgroup(body_node, source_bytes: bytes) -> bool:
 
 def has_channel_usage(body_node) -> bool:
     """Check if test uses channels for synchronization."""
-    # Query for make(chan ...), send/receive operations
-    channel_query = Query(GO_LANGUAGE, """
-    [
-      (call_expression
-        function: (identifier) @make
-        arguments: (argument_list
-          (channel_type)
-        )
-        (#eq? @make "make")
-      ) @make_chan
-      (send_statement) @send
-      (receive_statement) @receive
-    ]
-    """)
-
-    return len(channel_query.captures(body_node)) > 0
+    return any_match(_CHANNEL_Q, body_node)
 
 
-def check_unsynchronized_goroutines(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_unsynchronized_goroutines(test_func: TestFunction, rel_path: str) -> list[Issue]:
     """
     Detect goroutines without synchronization (CRITICAL).
 
@@ -77,36 +104,30 @@ def check_unsynchronized_goroutines(test_func: TestFunction, project_root: Path)
         return issues
 
     # Check if test has synchronization
-    has_waitgroup = has_sync_waitgroup(test_func.body_node, test_func.source_bytes)
+    has_waitgroup = has_sync_waitgroup(test_func.call_index())
     has_channels = has_channel_usage(test_func.body_node)
 
     if not (has_waitgroup or has_channels):
         for goroutine_node in goroutines:
+            line = goroutine_node.start_point[0] + 1
+            if not test_func.first_report(line, "go func("):
+                continue
             issues.append(Issue(
-                file=relative_path(test_func.filepath, project_root),
-                line=goroutine_node.start_point[0] + 1,
+                file=rel_path,
+                line=line,
                 test_name=test_func.name,
                 issue="Goroutine spawned without synchronization (WaitGroup/channels)",
                 category="Flaky Tests",
                 severity="Critical",
                 pattern="go func(",
-                code_snippet=get_code_snippet(goroutine_node, test_func.source_bytes),
+                code_snippet=lazy_code_snippet(goroutine_node, test_func.source_bytes),
                 suggestion="Use sync.WaitGroup to wait for goroutine completion, or use channels to receive results. Without synchronization, the test may finish before the goroutine completes"
             ))
 
     return issues
 
 
-def has_rand_seed(body_node, source_bytes: bytes) -> bool:
-    """Check if test has rand.Seed or rand.NewSource."""
-    return (
-        has_pattern_in_scope(body_node, source_bytes, "rand", "Seed") or
-        has_pattern_in_scope(body_node, source_bytes, "rand", "NewSource") or
-        has_pattern_in_scope(body_node, source_bytes, "rand", "New")
-    )
-
-
-def check_unseeded_random(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_unseeded_random(test_func: TestFunction, rel_path: str) -> list[Issue]:
     """
     Detect rand usage without deterministic seed (HIGH).
 
@@ -115,42 +136,43 @@ def check_unseeded_random(test_func: TestFunction, project_root: Path) -> list[I
     issues = []
 
     # Find rand.Int, rand.Float, rand.Intn calls
-    rand_methods = ["Int", "Float", "Intn", "Float32", "Float64", "Int31", "Int63"]
-
-    all_rand_calls = []
-    for method in rand_methods:
-        calls = find_function_calls(
-            test_func.body_node,
-            test_func.source_bytes,
-            package_pattern="rand",
-            method_pattern=method
-        )
-        all_rand_calls.extend(calls)
+    all_rand_calls = find_indexed_calls(
+        test_func.call_index(),
+        package_pattern="rand",
+        method_pattern="(Int|Float|Intn|Float32|Float64|Int31|Int63)"
+    )
 
     if not all_rand_calls:
         return issues
 
-    # Check if test has rand.Seed or rand.NewSource
-    has_seed = has_rand_seed(test_func.body_node, test_func.source_bytes)
+    # Check for rand.Seed, rand.NewSource or rand.New seeding
+    has_seed = has_indexed_call(
+        test_func.call_index(),
+        package_pattern="rand",
+        method_pattern="(Seed|NewSource|New)"
+    )
 
     if not has_seed:
-        for call_node, package, method in all_rand_calls:
+        for call_node, _, method in all_rand_calls:
+            line = call_node.start_point[0] + 1
+            if not test_func.first_report(line, f"rand.{method}"):
+                continue
             issues.append(Issue(
-                file=relative_path(test_func.filepath, project_root),
-                line=call_node.start_point[0] + 1,
+                file=rel_path,
+                line=line,
                 test_name=test_func.name,
                 issue="Using rand without deterministic seed causes non-reproducible test failures",
                 category="Flaky Tests",
                 severity="High",
                 pattern=f"rand.{method}",
-                code_snippet=get_code_snippet(call_node, test_func.source_bytes),
+                code_snippet=lazy_code_snippet(call_node, test_func.source_bytes),
                 suggestion="Use rand.New(rand.NewSource(1)) with a fixed seed for reproducible random data in tests"
             ))
 
     return issues
 
 
-def check_time_dependencies(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_time_dependencies(test_func: TestFunction, rel_path: str) -> list[Issue]:
     """
     Detect time.Now() usage without mocking (HIGH).
 
@@ -159,23 +181,25 @@ def check_time_dependencies(test_func: TestFunction, project_root: Path) -> list
     issues = []
 
     # Find time.Now() calls
-    calls = find_function_calls(
-        test_func.body_node,
-        test_func.source_bytes,
+    calls = find_indexed_calls(
+        test_func.call_index(),
         package_pattern="time",
         method_pattern="Now"
     )
 
     for call_node, package, method in calls:
+        line = call_node.start_point[0] + 1
+        if not test_func.first_report(line, "time.Now"):
+            continue
         issues.append(Issue(
-            file=relative_path(test_func.filepath, project_root),
-            line=call_node.start_point[0] + 1,
+            file=rel_path,
+            line=line,
             test_name=test_func.name,
             issue="Using time.Now() without mocking makes test time-dependent",
             category="Flaky Tests",
             severity="High",
             pattern="time.Now",
-            code_snippet=get_code_snippet(call_node, test_func.source_bytes),
+            code_snippet=lazy_code_snippet(call_node, test_func.source_bytes),
             suggestion="Inject a clock interface or use a fixed time in tests. Consider using a library like github.com/benbjohnson/clock for testable time"
         ))
 
@@ -184,18 +208,16 @@ def check_time_dependencies(test_func: TestFunction, project_root: Path) -> list
 
 def is_eventually_assertion(call_node, source_bytes: bytes) -> bool:
     """Check if this is a require.Eventually or assert.Eventually call."""
-    text = get_node_text(call_node, source_bytes)
-    return bool(re.search(r'(require|assert)\.Eventually', text))
+    return bool(_EVENTUALLY_RE.search(source_bytes, call_node.start_byte, call_node.end_byte))
 
 
 def has_numeric_timeout(call_node, source_bytes: bytes) -> bool:
     """Check if call has numeric timeout duration."""
-    text = get_node_text(call_node, source_bytes)
     # Look for patterns like "100 * time.Millisecond" or "5 * time.Second"
-    return bool(re.search(r'\d+\s*\*\s*time\.(Millisecond|Second|Minute)', text))
+    return bool(_NUMERIC_TIMEOUT_RE.search(source_bytes, call_node.start_byte, call_node.end_byte))
 
 
-def check_hardcoded_timeouts(test_func: TestFunction, project_root: Path) -> list[Issue]:
+def check_hardcoded_timeouts(test_func: TestFunction, rel_path: str) -> list[Issue]:
     """
     Detect hardcoded timeout durations (HIGH).
 
@@ -212,9 +234,8 @@ def check_hardcoded_timeouts(test_func: TestFunction, project_root: Path) -> lis
     ]
 
     for package, method in timeout_patterns:
-        calls = find_function_calls(
-            test_func.body_node,
-            test_func.source_bytes,
+        calls = find_indexed_calls(
+            test_func.call_index(),
             package_pattern=package,
             method_pattern=method
         )
@@ -226,15 +247,18 @@ def check_hardcoded_timeouts(test_func: TestFunction, project_root: Path) -> lis
 
             # Check if it has numeric duration
             if has_numeric_timeout(call_node, test_func.source_bytes):
+                line = call_node.start_point[0] + 1
+                if not test_func.first_report(line, f"{pkg}.{meth}"):
+                    continue
                 issues.append(Issue(
-                    file=relative_path(test_func.filepath, project_root),
-                    line=call_node.start_point[0] + 1,
+                    file=rel_path,
+                    line=line,
                     test_name=test_func.name,
                     issue="Hardcoded timeout duration may be too short on slow CI machines",
                     category="Flaky Tests",
                     severity="High",
                     pattern=f"{pkg}.{meth}",
-                    code_snippet=get_code_snippet(call_node, test_func.source_bytes),
+                    code_snippet=lazy_code_snippet(call_node, test_func.source_bytes),
                     suggestion="Use generous timeouts (5-10 seconds) or environment-configurable timeouts. Tests should fail on logic errors, not slow machines"
                 ))
 
@@ -243,28 +267,35 @@ def check_hardcoded_timeouts(test_func: TestFunction, project_root: Path) -> lis
 
 def analyze_file(filepath: Path, project_root: Path) -> list[Issue]:
     """Analyze a single test file for flaky patterns."""
-    tree = parse_go_file(filepath)
+    tree, source_bytes = get_parsed(filepath, TEST_FUNC_MARKERS, _TRIGGERS)
     if tree is None:
         return []
 
-    with open(filepath, 'rb') as f:
-        source_bytes = f.read()
-
     test_functions = find_test_functions(tree, filepath, source_bytes)
+    rel_path = relative_path(filepath, project_root)
 
     all_issues = []
     for test_func in test_functions:
-        all_issues.extend(check_unsynchronized_goroutines(test_func, project_root))
-        all_issues.extend(check_unseeded_random(test_func, project_root))
-        all_issues.extend(check_time_dependencies(test_func, project_root))
-        all_issues.extend(check_hardcoded_timeouts(test_func, project_root))
+        all_issues.extend(check_unsynchronized_goroutines(test_func, rel_path))
+        all_issues.extend(check_unseeded_random(test_func, rel_path))
+        all_issues.extend(check_time_dependencies(test_func, rel_path))
+        all_issues.extend(check_hardcoded_timeouts(test_func, rel_path))
 
     return all_issues
 
 
+def cap_group(pattern: str) -> Optional[str]:
+    """Return the capped group an issue pattern belongs to, if any."""
+    if pattern == "time.Now":
+        return "time.Now"
+    if "WithTimeout" in pattern or "After" in pattern:
+        return "timeout"
+    return None
+
+
 def main():
     """Main entry point."""
-    project_root = Path(sys.argv[1] if len(sys.argv) > 1 else ".")
+    project_root, jobs = parse_args("Check for flaky test patterns in Go tests.")
 
     # Validate project root
     if not project_root.exists():
@@ -272,36 +303,37 @@ def main():
         sys.exit(1)
 
     # Find test files
-    test_files = find_test_files(project_root)
+    test_files = find_test_files_cached(project_root)
 
     if not test_files:
         # No test files found - output empty result
-        print(build_json_output("check-flaky-patterns", []))
+        write_json_output("check-flaky-patterns", [])
         return
 
-    # Analyze all test files
-    all_issues = []
-    for test_file in test_files:
-        all_issues.extend(analyze_file(test_file, project_root))
-
-    # Sort issues by file and line number
-    all_issues.sort(key=lambda i: (i.file, i.line))
-
-    # Limit time.Now issues to 20 (matching bash behavior)
-    time_now_issues = [i for i in all_issues if i.pattern == "time.Now"]
-    other_issues = [i for i in all_issues if i.pattern != "time.Now"]
-    all_issues = other_issues + time_now_issues[:20]
-
-    # Limit timeout issues to 15 (matching bash behavior)
-    timeout_issues = [i for i in all_issues if "WithTimeout" in i.pattern or "After" in i.pattern]
-    other_issues = [i for i in all_issues if i not in timeout_issues]
-    all_issues = other_issues + timeout_issues[:15]
-
-    # Sort again after limiting
-    all_issues.sort(key=lambda i: (i.file, i.line))
+    # Analyze all test files in parallel; each file is independent.
+    # Issues of capped pattern groups are kept apart so they can be
+    # trimmed without filtering the full list.
+    uncapped = []
+    capped = {group: [] for group in CAP_LIMITS}
+    for issues in analyze_files(analyze_file, test_files, project_root, jobs):
+        for issue in issues:
+            group = cap_group(issue.pattern)
+            if group is None:
+                uncapped.append(issue)
+            else:
+                capped[group].append(issue)
+
+    # Sort by file and line number, keeping only the first issues of each
+    # capped group, then merge the sorted lists
+    uncapped.sort(key=ISSUE_SORT_KEY)
+    sorted_groups = [
+        heapq.nsmallest(CAP_LIMITS[group], issues, key=ISSUE_SORT_KEY)
+        for group, issues in capped.items()
+    ]
+    all_issues = list(heapq.merge(uncapped, *sorted_groups, key=ISSUE_SORT_KEY))
 
     # Output JSON
-    print(build_json_output("check-flaky-patterns", all_issues))
+    write_json_output("check-flaky-patterns", all_issues)
 
 
 if __name__ == "__main__":
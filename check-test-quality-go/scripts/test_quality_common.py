@@ -4,12 +4,29 @@ Shared utilities for Go test quality analysis using tree-sitter.
 This module provides common functionality for analyzing Go test files with
 accurate AST parsing instead of regex-based heuristics.
 """
-from dataclasses import dataclass, asdict, field
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from operator import attrgetter
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Union, Callable, Iterator, Set
+import argparse
+import hashlib
 import json
+import mmap
+import os
 import sys
 import re
+import stat
+import tempfile
+import threading
+
+# Optional fast JSON encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Tree-sitter imports
 from tree_sitter import Language, Parser, Query, Tree, Node, QueryCursor
@@ -20,7 +37,26 @@ import tree_sitter_go
 # Data Models
 # ============================================================================
 
-@dataclass
+class LazySnippet:
+    """
+    Code snippet whose formatting is deferred until the issue is output.
+
+    Holds only as many raw source bytes as the formatted snippet can use,
+    so issues that are later dropped by a cap never pay for decoding and
+    formatting. Unlike a Node, it pickles cleanly and cheaply across worker
+    processes.
+    """
+    __slots__ = ("raw", "max_length")
+
+    def __init__(self, raw: bytes, max_length: int = 100):
+        self.raw = raw
+        self.max_length = max_length
+
+    def __str__(self) -> str:
+        return format_snippet(self.raw.decode('utf-8'), self.max_length)
+
+
+@dataclass(slots=True)
 class Issue:
     """Represents a single test quality issue."""
     file: str
@@ -30,12 +66,27 @@ class Issue:
     category: str
     severity: str
     pattern: str
-    code_snippet: str
+    code_snippet: Union[str, LazySnippet]
     suggestion: str
     metrics: Dict[str, Any] = field(default_factory=dict)
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-ready dict, rendering any lazy snippet."""
+        return {
+            "file": self.file,
+            "line": self.line,
+            "test_name": self.test_name,
+            "issue": self.issue,
+            "category": self.category,
+            "severity": self.severity,
+            "pattern": self.pattern,
+            "code_snippet": str(self.code_snippet),
+            "suggestion": self.suggestion,
+            "metrics": self.metrics,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class TestFunction:
     """Represents a parsed test function."""
     name: str
@@ -44,6 +95,36 @@ class TestFunction:
     body_node: Node
     filepath: Path
     source_bytes: bytes
+    _call_index: Optional["CallIndex"] = field(default=None, repr=False, compare=False)
+    _reported: Set[Tuple[int, str]] = field(default_factory=set, repr=False, compare=False)
+
+    def call_index(self) -> "CallIndex":
+        """Qualified calls in the body, indexed on first use and shared by all checks."""
+        if self._call_index is None:
+            self._call_index = index_qualified_calls(self.body_node, self.source_bytes)
+        return self._call_index
+
+    def first_report(self, line: int, pattern: str) -> bool:
+        """
+        Record an issue about to be reported at (line, pattern).
+
+        Returns False if one was already reported there, so callers can
+        skip building a duplicate Issue.
+        """
+        key = (line, pattern)
+        if key in self._reported:
+            return False
+        self._reported.add(key)
+        return True
+
+    def body_contains(self, needle: bytes) -> bool:
+        """Check the body's raw bytes for a substring, without slicing or parsing."""
+        body = self.body_node
+        return self.source_bytes.find(needle, body.start_byte, body.end_byte) != -1
+
+
+# Sort key for issues: (file, line), extracted in C rather than by a lambda
+ISSUE_SORT_KEY = attrgetter("file", "line")
 
 
 # ============================================================================
@@ -53,13 +134,22 @@ class TestFunction:
 # Initialize Go language
 GO_LANGUAGE = Language(tree_sitter_go.language())
 
+# Files at least this large are screened for markers/triggers through mmap
+# before being read
+MMAP_SCREEN_MIN_SIZE = 256 * 1024
+
+# Source markers of files that can contain test functions; files without
+# any of them are skipped before parsing
+TEST_FUNC_MARKERS = (b"func Test", b"func Benchmark")
+
 # Common tree-sitter queries
 TEST_FUNCTIONS_QUERY = """
 (function_declaration
   name: (identifier) @test.name
   parameters: (parameter_list) @test.params
   body: (block) @test.body
-) (#match? @test.name "^Test")
+  (#match? @test.name "^Test")
+)
 """
 
 QUALIFIED_CALL_QUERY = """
@@ -88,34 +178,120 @@ CONTROL_FLOW_QUERY = """
 [
   (for_statement) @for
   (if_statement) @if
-  (switch_statement) @switch
+  (expression_switch_statement) @switch
+  (type_switch_statement) @switch
   (select_statement) @select
-] @control_flow
+]
 """
 
+# Compiled once at import; compiling is far more expensive than running a
+# query. Cursors cost well under a microsecond and stay per call.
+_TEST_FUNCTIONS_Q = Query(GO_LANGUAGE, TEST_FUNCTIONS_QUERY)
+_QUALIFIED_CALL_Q = Query(GO_LANGUAGE, QUALIFIED_CALL_QUERY)
+_GOROUTINE_Q = Query(GO_LANGUAGE, GOROUTINE_QUERY)
+_DEFER_Q = Query(GO_LANGUAGE, DEFER_QUERY)
+_CONTROL_FLOW_Q = Query(GO_LANGUAGE, CONTROL_FLOW_QUERY)
+
+# Idiomatic error checks, matched on raw source bytes to avoid decoding
+ERR_CHECK_RE = re.compile(rb'\berr\s*!=\s*nil\b')
+
 
 # ============================================================================
 # Core Parsing Functions
 # ============================================================================
 
-def parse_go_file(filepath: Path) -> Optional[Tree]:
+_TLS = threading.local()
+
+
+def get_parser() -> Parser:
+    """
+    Get this thread's Go parser, creating it on first use.
+
+    Reusing one parser per thread (and so per pool worker) avoids building
+    a new parser and re-setting its language for every file.
+    """
+    parser = getattr(_TLS, "parser", None)
+    if parser is None:
+        parser = Parser(GO_LANGUAGE)
+        _TLS.parser = parser
+    return parser
+
+
+def parse_go_file(filepath: Path) -> Tuple[Optional[Tree], bytes]:
     """
     Parse a Go source file into tree-sitter AST.
 
+    The file is read once; the bytes are returned alongside the tree so
+    callers don't need to read it again for node text.
+
     Args:
         filepath: Path to Go source file
 
     Returns:
-        Parsed tree or None if parsing fails
+        Tuple of (parsed tree or None if parsing fails, raw source bytes)
     """
     try:
         with open(filepath, 'rb') as f:
-            source_code = f.read()
-        parser = Parser(GO_LANGUAGE)
-        return parser.parse(source_code)
+            source_bytes = f.read()
+        return get_parser().parse(source_bytes), source_bytes
     except Exception as e:
         print(f"Warning: Failed to parse {filepath}: {e}", file=sys.stderr)
-        return None
+        return None, b""
+
+
+def get_parsed(
+    filepath: Path,
+    markers: Tuple[bytes, ...] = (),
+    triggers: Tuple[bytes, ...] = ()
+) -> Tuple[Optional[Tree], bytes]:
+    """
+    Read and parse a Go source file, skipping files that fail the screens.
+
+    Args:
+        filepath: Path to Go source file
+        markers: Byte strings of which at least one must occur in the source
+            for it to be parsed (empty = always parse)
+        triggers: Further byte strings of which at least one must also occur,
+            typically everything a script's checks look for (empty = no screen)
+
+    Returns:
+        Tuple of (parsed tree or None if parsing fails or a screen finds
+        nothing, raw source bytes; empty if a large file was screened out
+        without being read)
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            # Screen large files through a read-only mapping first, so ones
+            # that won't be parsed are never copied into memory
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_SCREEN_MIN_SIZE and (markers or triggers):
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    if not _passes_screens(mapped, markers, triggers):
+                        return None, b""
+            source_bytes = f.read()
+
+        # Cheap substring screens before paying for a full parse
+        if not _passes_screens(source_bytes, markers, triggers):
+            return None, source_bytes
+
+        return get_parser().parse(source_bytes), source_bytes
+    except Exception as e:
+        print(f"Warning: Failed to parse {filepath}: {e}", file=sys.stderr)
+        return None, b""
+
+
+def _passes_screens(
+    source: Union[bytes, mmap.mmap],
+    markers: Tuple[bytes, ...],
+    triggers: Tuple[bytes, ...]
+) -> bool:
+    """Check that some marker and some trigger occur (empty = no screen)."""
+    # find() rather than `in`: for an mmap, `in` only tests single bytes
+    if markers and not any(source.find(marker) != -1 for marker in markers):
+        return False
+    if triggers and not any(source.find(trigger) != -1 for trigger in triggers):
+        return False
+    return True
 
 
 def find_test_functions(tree: Tree, filepath: Path, source_bytes: bytes) -> List[TestFunction]:
@@ -130,18 +306,12 @@ def find_test_functions(tree: Tree, filepath: Path, source_bytes: bytes) -> List
     Returns:
         List of TestFunction objects
     """
-    query = Query(GO_LANGUAGE, TEST_FUNCTIONS_QUERY)
-    cursor = QueryCursor(query)
-    captures_dict = cursor.captures(tree.root_node)
-
     test_functions = []
 
-    # Match test names with their bodies
-    test_names = captures_dict.get("test.name", [])
-    test_bodies = captures_dict.get("test.body", [])
-
-    # Assuming names and bodies are in matching order
-    for i, (name_node, body_node) in enumerate(zip(test_names, test_bodies)):
+    # Each match keeps a function's name and body together
+    for _, captures in QueryCursor(_TEST_FUNCTIONS_Q).matches(tree.root_node):
+        name_node = captures["test.name"][0]
+        body_node = captures["test.body"][0]
         test_functions.append(TestFunction(
             name=get_node_text(name_node, source_bytes),
             start_line=body_node.start_point[0] + 1,
@@ -171,8 +341,37 @@ def get_code_snippet(node: Node, source_bytes: bytes, max_length: int = 100) ->
     Returns:
         Formatted code snippet
     """
-    snippet = get_node_text(node, source_bytes)
+    return format_snippet(get_node_text(node, source_bytes), max_length)
+
+
+def lazy_code_snippet(node: Node, source_bytes: bytes, max_length: int = 100) -> LazySnippet:
+    """
+    Capture a code snippet from AST node without formatting it yet.
 
+    Args:
+        node: AST node
+        source_bytes: Raw source code bytes
+        max_length: Maximum snippet length
+
+    Returns:
+        LazySnippet that formats like get_code_snippet when converted to str
+    """
+    # Keep through the first newline, or enough bytes for more than
+    # max_length characters, so large nodes aren't copied and pickled whole
+    start = node.start_byte
+    end = min(node.end_byte, start + max_length * 4 + 4)
+    newline = source_bytes.find(b"\n", start, end)
+    if newline != -1:
+        end = newline + 1
+    elif end < node.end_byte:
+        # Don't cut a multi-byte character in half
+        while source_bytes[end] & 0xC0 == 0x80:
+            end -= 1
+    return LazySnippet(source_bytes[start:end], max_length)
+
+
+def format_snippet(snippet: str, max_length: int = 100) -> str:
+    """Collapse a snippet to its first line and truncate it to max_length."""
     # Collapse to single line if multiline
     if '\n' in snippet:
         snippet = snippet.split('\n')[0] + '...'
@@ -188,6 +387,36 @@ def get_code_snippet(node: Node, source_bytes: bytes, max_length: int = 100) ->
 # Query Helper Functions
 # ============================================================================
 
+@lru_cache(maxsize=256)
+def _anchored(pattern: str) -> re.Pattern:
+    """Compile a package/method pattern to match whole names, once per pattern."""
+    return re.compile(f"^{pattern}$")
+
+
+def _iter_function_calls(
+    body_node: Node,
+    source_bytes: bytes,
+    package_pattern: str,
+    method_pattern: Optional[str] = None
+) -> Iterator[Tuple[Node, str, str]]:
+    """Yield (call_node, package_name, method_name) for each matching call, in source order."""
+    package_re = _anchored(package_pattern)
+    method_re = None if method_pattern is None else _anchored(method_pattern)
+
+    # Each match groups the call with its own package and method nodes
+    for _, captures in QueryCursor(_QUALIFIED_CALL_Q).matches(body_node):
+        package = get_node_text(captures["package"][0], source_bytes)
+
+        # Match package pattern
+        if not package_re.match(package):
+            continue
+
+        # Match method pattern if specified
+        method = get_node_text(captures["method"][0], source_bytes)
+        if method_re is None or method_re.match(method):
+            yield captures["call"][0], package, method
+
+
 def find_function_calls(
     body_node: Node,
     source_bytes: bytes,
@@ -206,31 +435,99 @@ def find_function_calls(
     Returns:
         List of (call_node, package_name, method_name) tuples
     """
-    query = Query(GO_LANGUAGE, QUALIFIED_CALL_QUERY)
-    cursor = QueryCursor(query)
-    captures_dict = cursor.captures(body_node)
+    return list(_iter_function_calls(body_node, source_bytes, package_pattern, method_pattern))
 
-    results = []
 
-    # Get all captured nodes
-    call_nodes = captures_dict.get("call", [])
-    package_nodes = captures_dict.get("package", [])
-    method_nodes = captures_dict.get("method", [])
+# Qualified calls in a scope, keyed by (package, method) name
+CallIndex = Dict[Tuple[str, str], List[Node]]
 
-    # Match them up (assuming they're in corresponding order)
-    for call_node, package_node, method_node in zip(call_nodes, package_nodes, method_nodes):
-        package = get_node_text(package_node, source_bytes)
-        method = get_node_text(method_node, source_bytes)
 
-        # Match package pattern
-        if re.match(f"^{package_pattern}$", package):
-            # Match method pattern if specified
-            if method_pattern is None or re.match(f"^{method_pattern}$", method):
-                results.append((call_node, package, method))
+def index_qualified_calls(body_node: Node, source_bytes: bytes) -> CallIndex:
+    """
+    Index all package.method calls within a node in one query pass.
+
+    Checks that ask several questions about the same scope look them up
+    here instead of each walking the AST again.
 
+    Args:
+        body_node: AST node to search within
+        source_bytes: Raw source code bytes
+
+    Returns:
+        Dict mapping (package, method) to call nodes in source order
+    """
+    index: CallIndex = {}
+    for _, captures in QueryCursor(_QUALIFIED_CALL_Q).matches(body_node):
+        key = (
+            get_node_text(captures["package"][0], source_bytes),
+            get_node_text(captures["method"][0], source_bytes),
+        )
+        index.setdefault(key, []).append(captures["call"][0])
+    return index
+
+
+def find_indexed_calls(
+    index: CallIndex,
+    package_pattern: str,
+    method_pattern: Optional[str] = None
+) -> List[Tuple[Node, str, str]]:
+    """
+    Find calls matching package.method pattern in a call index.
+
+    Patterns are matched once per distinct (package, method) pair rather
+    than once per call.
+
+    Args:
+        index: Call index from index_qualified_calls
+        package_pattern: Package name or regex pattern
+        method_pattern: Method name or regex pattern (None = match all)
+
+    Returns:
+        List of (call_node, package_name, method_name) tuples in source order
+    """
+    package_re = _anchored(package_pattern)
+    method_re = None if method_pattern is None else _anchored(method_pattern)
+    results = []
+    keys = 0
+    for (package, method), call_nodes in index.items():
+        if not package_re.match(package):
+            continue
+        if method_re is None or method_re.match(method):
+            results.extend((call_node, package, method) for call_node in call_nodes)
+            keys += 1
+    # Each key's calls are already in source order; only interleave them
+    # when several keys matched
+    if keys > 1:
+        results.sort(key=lambda result: result[0].start_byte)
     return results
 
 
+def has_indexed_call(
+    index: CallIndex,
+    package_pattern: str,
+    method_pattern: Optional[str] = None
+) -> bool:
+    """
+    Check if a call index contains a call matching package.method pattern.
+
+    Args:
+        index: Call index from index_qualified_calls
+        package_pattern: Package name pattern
+        method_pattern: Method name pattern (None = match all)
+
+    Returns:
+        True if pattern found in the index
+    """
+    package_re = _anchored(package_pattern)
+    method_re = None if method_pattern is None else _anchored(method_pattern)
+    for package, method in index:
+        if not package_re.match(package):
+            continue
+        if method_re is None or method_re.match(method):
+            return True
+    return False
+
+
 def has_pattern_in_scope(
     body_node: Node,
     source_bytes: bytes,
@@ -240,6 +537,8 @@ def has_pattern_in_scope(
     """
     Check if a function call pattern exists in scope.
 
+    Stops at the first matching call instead of collecting all of them.
+
     Args:
         body_node: AST node to search within
         source_bytes: Raw source code bytes
@@ -249,21 +548,38 @@ def has_pattern_in_scope(
     Returns:
         True if pattern found in scope
     """
-    return len(find_function_calls(body_node, source_bytes, package_pattern, method_pattern)) > 0
+    calls = _iter_function_calls(body_node, source_bytes, package_pattern, method_pattern)
+    return any(True for _ in calls)
+
+
+def any_match(query: Query, node: Node) -> bool:
+    """
+    Check whether a query matches anywhere within a node.
+
+    Returns on the first match without building capture lists.
+
+    Args:
+        query: Compiled tree-sitter query
+        node: AST node to search within
+
+    Returns:
+        True if the query matches at least once
+    """
+    for _ in QueryCursor(query).matches(node):
+        return True
+    return False
 
 
 def find_goroutines(body_node: Node) -> List[Node]:
     """Find all goroutine launches in scope."""
-    query = Query(GO_LANGUAGE, GOROUTINE_QUERY)
-    cursor = QueryCursor(query)
+    cursor = QueryCursor(_GOROUTINE_Q)
     captures_dict = cursor.captures(body_node)
     return captures_dict.get("goroutine", [])
 
 
 def find_defer_statements(body_node: Node) -> List[Node]:
     """Find all defer statements in scope."""
-    query = Query(GO_LANGUAGE, DEFER_QUERY)
-    cursor = QueryCursor(query)
+    cursor = QueryCursor(_DEFER_Q)
     captures_dict = cursor.captures(body_node)
     return captures_dict.get("defer", [])
 
@@ -281,8 +597,7 @@ def count_control_flow_statements(body_node: Node, source_bytes: bytes) -> int:
     Returns:
         Count of non-error-handling control flow statements
     """
-    query = Query(GO_LANGUAGE, CONTROL_FLOW_QUERY)
-    cursor = QueryCursor(query)
+    cursor = QueryCursor(_CONTROL_FLOW_Q)
     captures_dict = cursor.captures(body_node)
 
     count = 0
@@ -292,8 +607,7 @@ def count_control_flow_statements(body_node: Node, source_bytes: bytes) -> int:
         for node in nodes:
             # Skip if statements that are error checks
             if capture_name == "if":
-                node_text = get_node_text(node, source_bytes)
-                if re.search(r'\berr\s*!=\s*nil\b', node_text):
+                if ERR_CHECK_RE.search(source_bytes, node.start_byte, node.end_byte):
                     continue
             count += 1
 
@@ -304,26 +618,249 @@ def count_control_flow_statements(body_node: Node, source_bytes: bytes) -> int:
 # File Discovery
 # ============================================================================
 
-def find_test_files(project_root: Path) -> List[Path]:
+# Directories never searched for test files: dependencies, VCS metadata and
+# Go's testdata fixtures (dot-directories are skipped as well)
+SKIP_DIRS = frozenset({"vendor", "node_modules", "testdata"})
+
+
+def find_test_files(project_root: Path, skip_dirs: frozenset = SKIP_DIRS) -> List[Path]:
     """
     Find all Go test files in project.
 
+    Walks the tree with os.scandir, which reports entry types without an
+    extra stat per entry, and prunes skipped directories as it goes.
+
     Args:
         project_root: Root directory to search
+        skip_dirs: Directory names to skip in addition to dot-directories
 
     Returns:
         List of paths to *_test.go files
     """
-    return sorted([
-        p for p in project_root.rglob("*_test.go")
-        if p.is_file()
-    ])
+    files, _ = _scan_test_files(str(project_root), skip_dirs)
+    return sorted(Path(p) for p in files)
+
+
+def find_test_files_cached(project_root: Path) -> List[Path]:
+    """
+    Find all Go test files in project, reusing the previous scan if still valid.
+
+    The file list is stored in the user's cache directory together with the
+    mtime of every directory that was scanned. Adding, removing or renaming
+    an entry changes its directory's mtime, so if all recorded mtimes still
+    match, the list is current and a stat per directory replaces the full
+    walk. This lets the check scripts, which each need the same list,
+    share one scan.
+
+    Args:
+        project_root: Root directory to search
+
+    Returns:
+        List of paths to *_test.go files
+    """
+    root = os.path.abspath(project_root)
+    cache_name = hashlib.sha1(root.encode()).hexdigest() + ".json"
+
+    try:
+        cache_dir = user_cache_dir("test-quality-go")
+    except OSError as e:
+        print(f"Warning: File list cache unavailable: {e}", file=sys.stderr)
+        cache_dir = None
+
+    if cache_dir is not None:
+        cached_files = _load_cached_test_files(os.path.join(cache_dir, cache_name), root)
+        if cached_files is not None:
+            return [Path(project_root, p) for p in cached_files]
+
+    files, dir_mtimes = _scan_test_files(root, SKIP_DIRS)
+    rel_files = sorted(os.path.relpath(p, root) for p in files)
+
+    # Write to a unique temp file and rename, as scripts run concurrently
+    if cache_dir is not None:
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"dirs": dir_mtimes, "files": rel_files}, f)
+            os.replace(tmp_path, os.path.join(cache_dir, cache_name))
+        except OSError as e:
+            print(f"Warning: Failed to write file list cache: {e}", file=sys.stderr)
+
+    return [Path(project_root, p) for p in rel_files]
+
+
+def user_cache_dir(name: str) -> str:
+    """
+    Return a private per-user cache directory, creating it if needed.
+
+    Lives under $XDG_CACHE_HOME (default ~/.cache) and is created with mode
+    0700. Raises OSError if the directory exists but is not a directory
+    owned by the current user.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, name)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise OSError(f"{path} is not a directory")
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        raise OSError(f"{path} is not owned by the current user")
+    if st.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def _load_cached_test_files(cache_file: str, root: str) -> Optional[List[str]]:
+    """
+    Load a cached test file list for root if it is well-formed and current.
+
+    Returns the root-relative paths, skipping any that are absolute or
+    would leave root, or None if the cache is missing, malformed or stale.
+    """
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = json.load(f)
+        dirs = cached["dirs"]
+        files = cached["files"]
+        if not isinstance(dirs, dict) or not isinstance(files, list):
+            return None
+        for d, mtime in dirs.items():
+            if not _is_within(d, root) or type(mtime) is not int:
+                return None
+            if os.stat(d).st_mtime_ns != mtime:
+                return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    return [
+        p for p in files
+        if isinstance(p, str) and not os.path.isabs(p)
+        and ".." not in Path(p).parts and _is_within(os.path.join(root, p), root)
+    ]
+
+
+def _is_within(path: str, root: str) -> bool:
+    """Check whether path, normalized, is root or lies under it."""
+    path = os.path.normpath(path)
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def _scan_test_files(root: str, skip_dirs: frozenset) -> Tuple[List[str], Dict[str, int]]:
+    """Walk root for *_test.go files, also returning each scanned directory's mtime."""
+    found = []
+    dir_mtimes = {}
+    stack = [root]
+
+    while stack:
+        directory = stack.pop()
+        try:
+            dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith(".") and entry.name not in skip_dirs:
+                            stack.append(entry.path)
+                    elif entry.name.endswith("_test.go") and entry.is_file():
+                        found.append(entry.path)
+        except OSError:
+            continue
+
+    return found, dir_mtimes
+
+
+# ============================================================================
+# Script Runner
+# ============================================================================
+
+def _positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def parse_args(description: str) -> Tuple[Path, Optional[int]]:
+    """
+    Parse the command line shared by all check scripts.
+
+    Returns:
+        Tuple of (project root, number of worker processes or None for one per CPU)
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("project_root", nargs="?", default=".", type=Path,
+                        help="Go project to analyze (default: current directory)")
+    parser.add_argument("--jobs", "-j", type=_positive_int, default=None,
+                        help="Worker processes (default: one per CPU; 1 runs in-process for debugging)")
+    args = parser.parse_args()
+    return args.project_root, args.jobs
+
+
+def analyze_files(
+    analyze_file: Callable[..., List[Issue]],
+    test_files: List[Path],
+    project_root: Path,
+    jobs: Optional[int] = None
+) -> Iterator[List[Issue]]:
+    """
+    Run analyze_file over all test files, yielding each file's issues in order.
+
+    Files are independent, so they are spread across a process pool.
+    With jobs=1 everything runs in this process, which keeps tracebacks
+    and debuggers usable.
+    """
+    analyze = partial(analyze_file, project_root=project_root)
+    if jobs == 1:
+        yield from map(analyze, test_files)
+        return
+
+    # max_workers=None means one worker per CPU
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(analyze, test_files, chunksize=8)
 
 
 # ============================================================================
 # JSON Output
 # ============================================================================
 
+def build_output(script_name: str, issues: List[Issue]) -> Dict[str, Any]:
+    """
+    Build the output structure matching original bash script format.
+
+    Args:
+        script_name: Name of the script (e.g., "check-external-deps")
+        issues: List of Issue objects
+
+    Returns:
+        Output dict ready for JSON serialization
+    """
+    return {
+        "script": script_name,
+        "issues": [i.to_dict() for i in issues],
+        "summary": summarize_issues(issues)
+    }
+
+
+def summarize_issues(issues: List[Issue]) -> Dict[str, int]:
+    """Count issues by severity and the files they occur in."""
+    # Count severities in one pass
+    severities = Counter(i.severity for i in issues)
+
+    # Count unique files
+    files = {i.file for i in issues}
+
+    return {
+        "total_issues": len(issues),
+        "critical_count": severities["Critical"],
+        "high_count": severities["High"],
+        "medium_count": severities["Medium"],
+        "files_with_issues": len(files)
+    }
+
+
 def build_json_output(script_name: str, issues: List[Issue]) -> str:
     """
     Build JSON output matching original bash script format.
@@ -335,28 +872,47 @@ def build_json_output(script_name: str, issues: List[Issue]) -> str:
     Returns:
         Formatted JSON string
     """
-    # Count severities
-    critical = sum(1 for i in issues if i.severity == "Critical")
-    high = sum(1 for i in issues if i.severity == "High")
-    medium = sum(1 for i in issues if i.severity == "Medium")
+    return json.dumps(build_output(script_name, issues), indent=2, ensure_ascii=False)
 
-    # Count unique files
-    unique_files = len(set(i.file for i in issues))
 
-    # Build output structure
-    output = {
-        "script": script_name,
-        "issues": [asdict(i) for i in issues],
-        "summary": {
-            "total_issues": len(issues),
-            "critical_count": critical,
-            "high_count": high,
-            "medium_count": medium,
-            "files_with_issues": unique_files
-        }
-    }
+def write_json_output(script_name: str, issues: List[Issue]) -> None:
+    """
+    Write JSON output for the issues to stdout.
 
-    return json.dumps(output, indent=2)
+    Uses orjson when available, which serializes the Issue dataclasses
+    directly in C (no per-issue dict copies) and writes its bytes straight
+    to the stdout buffer without building an intermediate str. Falls back
+    to json.
+
+    Args:
+        script_name: Name of the script (e.g., "check-external-deps")
+        issues: List of Issue objects
+    """
+    if orjson is None:
+        # Encode explicitly so non-ASCII text is written as UTF-8, like orjson
+        data = build_json_output(script_name, issues).encode() + b"\n"
+    else:
+        output = {
+            "script": script_name,
+            "issues": issues,
+            "summary": summarize_issues(issues)
+        }
+        data = orjson.dumps(
+            output,
+            default=_render_lazy,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+        )
+
+    sys.stdout.flush()
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+
+
+def _render_lazy(obj: Any) -> str:
+    """orjson fallback for values it can't serialize natively."""
+    if isinstance(obj, LazySnippet):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
 
 
 # ============================================================================
@@ -6,15 +6,39 @@
 """Code health analyzer - detects large files, test gaps, duplicates, dead code, and doc issues."""
 
 import argparse
+import base64
+import fnmatch
+import hashlib
 import json
 import os
 import re
+import shutil
+import sqlite3
+import stat
 import subprocess
 import sys
-from dataclasses import dataclass, field, asdict
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+# Optional fast JSON encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Exported declarations, matched on raw file bytes, and their name parsers;
+# compiled once at import
+_TYPE_DECL_RE = re.compile(rb"^type [A-Z]", re.MULTILINE)
+_FUNC_DECL_RE = re.compile(rb"^func [A-Z]", re.MULTILINE)
+_TYPE_NAME_RE = re.compile(r"^type (\w+)")
+_FUNC_NAME_RE = re.compile(r"^func (\w+)")
 
 
 class Severity(Enum):
@@ -41,7 +65,8 @@ class Finding:
     action: str
 
     def to_dict(self):
-        return {k: v for k, v in asdict(self).items() if v is not None}
+        # Fields are all flat values, so skip asdict's recursive copy
+        return {k: v for k, v in vars(self).items() if v is not None}
 
 
 @dataclass
@@ -60,8 +85,35 @@ class HealthReport:
     tools_missing: list[str] = field(default_factory=list)
 
 
+def shared_cache(func):
+    """lru_cache that computes each result once even when checks run concurrently."""
+    cached = lru_cache(maxsize=8)(func)
+    lock = threading.Lock()
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with lock:
+            return cached(*args, **kwargs)
+    return wrapper
+
+
+# Warnings about partial tool output, collected per check by run_check
+_check_warnings = threading.local()
+
+
+def warn(message: str):
+    """Record a warning against the check running on this thread."""
+    messages = getattr(_check_warnings, "messages", None)
+    if messages is None:
+        print(f"Warning: {message}", file=sys.stderr)
+    else:
+        messages.append(message)
+
+
 def run_cmd(cmd: list[str], cwd: str = ".") -> tuple[int, str, str]:
     """Run command and return (returncode, stdout, stderr)."""
+    if not has_tool(cmd[0]):
+        return -1, "", f"Command not found: {cmd[0]}"
     try:
         result = subprocess.run(
             cmd, cwd=cwd, capture_output=True, text=True, timeout=60
@@ -73,16 +125,69 @@ def run_cmd(cmd: list[str], cwd: str = ".") -> tuple[int, str, str]:
         return -1, "", "Command timed out"
 
 
+def run_cmd_lines(
+    cmd: list[str], cwd: str = ".", timeout: int = 60, warnings: Optional[list[str]] = None
+) -> Iterator[bytes]:
+    """Run command and yield its stdout lines as they are produced.
+
+    Exit status 1 (no matches, for grep-like tools) counts as success. Exit
+    status 2 after some output (rg skipping files it can't read) is added
+    to warnings when given. Any other failure, or running past the timeout,
+    raises RuntimeError.
+    """
+    if not has_tool(cmd[0]):
+        return
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            proc = subprocess.Popen(
+                cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=stderr, bufsize=1 << 20
+            )
+        except FileNotFoundError:
+            return
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, expire)
+        timer.start()
+        produced = False
+        try:
+            with proc:
+                try:
+                    for line in proc.stdout:
+                        produced = True
+                        yield line
+                except GeneratorExit:
+                    proc.kill()
+                    raise
+        finally:
+            timer.cancel()
+        if timed_out.is_set():
+            raise RuntimeError(f"Command timed out: {cmd[0]}")
+        if proc.returncode in (0, 1):
+            return
+        stderr.seek(0)
+        message = f"{cmd[0]} exited with status {proc.returncode}: {stderr.read().decode(errors='replace').strip()}"
+        if proc.returncode == 2 and produced and warnings is not None:
+            warnings.append(message)
+            return
+        raise RuntimeError(message)
+
+
+@lru_cache(maxsize=32)
 def has_tool(name: str) -> bool:
     """Check if a tool is available."""
-    code, _, _ = run_cmd(["which", name])
-    return code == 0
+    return shutil.which(name) is not None
 
 
+@lru_cache(maxsize=4)
 def detect_project_type(directory: str) -> ProjectType:
     """Detect the primary project type."""
     p = Path(directory)
-    if (p / "go.mod").exists() or list(p.glob("**/*.go")):
+    # Any .go file also makes it a Go project; the walk is shared with the checks
+    if (p / "go.mod").exists() or _walk(directory).by_suffix.get(".go"):
         return ProjectType.GO
     if (p / "pyproject.toml").exists() or (p / "setup.py").exists():
         return ProjectType.PYTHON
@@ -93,61 +198,241 @@ def detect_project_type(directory: str) -> ProjectType:
     return ProjectType.UNKNOWN
 
 
+DEFAULT_EXCLUDES = ("vendor", "node_modules", ".git", "__pycache__", "venv", ".venv")
+
+
+@dataclass
+class FileTree:
+    """Files under a directory, in walk order and bucketed by suffix."""
+    files: list[str] = field(default_factory=list)
+    by_suffix: dict[str, list[str]] = field(default_factory=dict)
+
+
+@shared_cache
+def _walk(directory: str, exclude: tuple[str, ...] = DEFAULT_EXCLUDES) -> FileTree:
+    """
+    Walk directory once, skipping excluded directories and symlinks.
+    
+    Entry types come from the directory listing itself, so no file is
+    stat'ed here; checks stat only the files they need.
+    """
+    tree = FileTree()
+    stack = [os.scandir(directory)]
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop().close()
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in exclude:
+                    stack.append(os.scandir(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                tree.files.append(entry.path)
+                tree.by_suffix.setdefault(os.path.splitext(entry.name)[1], []).append(entry.path)
+        except OSError:
+            continue
+    return tree
+
+
 def find_files(directory: str, pattern: str, exclude: list[str] = None) -> list[str]:
     """Find files matching pattern, excluding directories."""
-    exclude = exclude or ["vendor", "node_modules", ".git", "__pycache__", "venv", ".venv"]
-    
-    if has_tool("fd"):
-        cmd = ["fd", "-t", "f", pattern, directory]
-        for ex in exclude:
-            cmd.extend(["-E", ex])
-        code, out, _ = run_cmd(cmd)
-        if code == 0:
-            return [f for f in out.strip().split("\n") if f]
-    
-    # Fallback to find
-    cmd = ["find", directory, "-type", "f", "-name", pattern]
-    for ex in exclude:
-        cmd.extend(["!", "-path", f"*/{ex}/*"])
-    code, out, _ = run_cmd(cmd)
-    if code == 0:
-        return [f for f in out.strip().split("\n") if f]
-    return []
-
-
-def grep_files(pattern: str, directory: str, glob: str = None, context_before: int = 0) -> list[tuple[str, int, str]]:
+    tree = _walk(directory, tuple(exclude) if exclude else DEFAULT_EXCLUDES)
+    
+    # Patterns ending in a literal suffix only need that suffix's bucket
+    suffix = os.path.splitext(pattern)[1]
+    if suffix and not any(c in suffix for c in "*?["):
+        candidates = tree.by_suffix.get(suffix, [])
+    else:
+        candidates = tree.files
+    return [f for f in candidates if fnmatch.fnmatchcase(os.path.basename(f), pattern)]
+
+
+def _rg_text(value: dict) -> str:
+    """Decode an rg --json string, which is base64 "bytes" when not valid UTF-8."""
+    if "text" in value:
+        return value["text"]
+    return base64.b64decode(value["bytes"]).decode("utf-8", errors="replace")
+
+
+def _rg_multi(
+    patterns: list[tuple[str, str]], directory: str, glob: str = None, warnings: Optional[list[str]] = None
+) -> Iterator[tuple[str, str, int, str]]:
+    """Search for several tagged patterns in one rg pass. Yields (tag, file, line, content).
+    
+    A line matching more than one pattern is yielded once per tag. Errors rg
+    reports alongside its matches are added to warnings.
+    """
+    if not has_tool("rg"):
+        return
+    
+    cmd = ["rg", "--json"]
+    if glob:
+        cmd.extend(["-g", glob])
+    for _, pattern in patterns:
+        cmd.extend(["-e", pattern])
+    cmd.append(directory)
+    
+    # rg reports the line, not which pattern fired, so re-match each tag.
+    # Events are parsed as rg emits them rather than after it finishes.
+    tagged = [(tag, re.compile(pattern)) for tag, pattern in patterns]
+    loads = orjson.loads if orjson is not None else json.loads
+    for line in run_cmd_lines(cmd, warnings=warnings):
+        event = loads(line)
+        if event["type"] != "match":
+            continue
+        data = event["data"]
+        path = _rg_text(data["path"])
+        content = _rg_text(data["lines"]).removesuffix("\n")
+        for tag, regex in tagged:
+            if regex.search(content):
+                yield tag, path, data["line_number"], content
+
+
+def grep_files(pattern: str, directory: str, glob: str = None) -> list[tuple[str, int, str]]:
     """Search for pattern in files. Returns list of (file, line, content)."""
-    results = []
-    
-    if has_tool("rg"):
-        cmd = ["rg", "-n", "--no-heading"]
-        if glob:
-            cmd.extend(["-g", glob])
-        if context_before:
-            cmd.extend([f"-B{context_before}"])
-        cmd.extend(["-e", pattern, directory])
-        code, out, _ = run_cmd(cmd)
-        if code == 0:
-            for line in out.strip().split("\n"):
-                if line and ":" in line:
-                    parts = line.split(":", 2)
-                    if len(parts) >= 3:
-                        try:
-                            results.append((parts[0], int(parts[1]), parts[2]))
-                        except ValueError:
-                            pass
+    warnings = []
+    results = [
+        (f, line, content)
+        for _, f, line, content in _rg_multi([("match", pattern)], directory, glob, warnings)
+    ]
+    for message in warnings:
+        warn(message)
     return results
 
 
+_LEGACY_PATTERN = r"(TODO|FIXME|HACK|XXX|deprecated|legacy)"
+
+# Patterns the Go checks look for, tagged by what they detect
+_GO_PATTERNS = (
+    ("legacy", _LEGACY_PATTERN),
+    ("panic", r'panic\("(unimplemented|not implemented|todo)"'),
+    ("func", r"^func [A-Z]"),
+    ("dupe", r"(?i)(copy.?paste|same as|similar to|duplicate)"),
+)
+
+
+@shared_cache
+def _grep_go(directory: str) -> tuple[dict[str, list[tuple[str, int, str]]], list[str]]:
+    """Search Go files for all _GO_PATTERNS at once. Returns (results by tag, warnings)."""
+    results = {tag: [] for tag, _ in _GO_PATTERNS}
+    warnings = []
+    for tag, f, line, content in _rg_multi(list(_GO_PATTERNS), directory, "*.go", warnings):
+        results[tag].append((f, line, content))
+    return results, warnings
+
+
+def grep_go(directory: str) -> dict[str, list[tuple[str, int, str]]]:
+    """Search Go files for all _GO_PATTERNS at once. Returns (file, line, content) lists by tag."""
+    results, warnings = _grep_go(directory)
+    # The search is shared between checks, so each caller reports its warnings
+    for message in warnings:
+        warn(message)
+    return results
+
+
+def _match_lines(data: bytes, regex: re.Pattern) -> Iterator[tuple[int, str]]:
+    """Yield (line number, line) for each line of data where regex matches, lazily."""
+    line = 1
+    pos = 0
+    for match in regex.finditer(data):
+        start = data.rfind(b"\n", 0, match.start()) + 1
+        line += data.count(b"\n", pos, start)
+        pos = start
+        end = data.find(b"\n", start)
+        if end == -1:
+            end = len(data)
+        yield line, data[start:end].decode("utf-8", errors="replace")
+
+
 def count_lines(filepath: str) -> int:
     """Count lines in a file."""
     try:
-        with open(filepath, "r", errors="ignore") as f:
-            return sum(1 for _ in f)
+        with open(filepath, "rb") as f:
+            lines = 0
+            last = b""
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                lines += chunk.count(b"\n")
+                last = chunk
+            # A final line without a trailing newline still counts
+            if last and not last.endswith(b"\n"):
+                lines += 1
+            return lines
     except:
         return 0
 
 
+def user_cache_dir(name: str) -> str:
+    """
+    Return a private per-user cache directory, creating it if needed.
+    
+    Lives under $XDG_CACHE_HOME (default ~/.cache) and is created with mode
+    0700. Raises OSError if the directory exists but is not a directory
+    owned by the current user.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, name)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise OSError(f"{path} is not a directory")
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        raise OSError(f"{path} is not owned by the current user")
+    if st.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def count_lines_cached(directory: str, stats: dict[str, os.stat_result]) -> dict[str, int]:
+    """
+    Count lines in files under directory, reusing counts from previous runs.
+    
+    Counts are stored in an SQLite database in the user's cache directory
+    together with each file's size and mtime, and reused while both still
+    match.
+    """
+    conn = None
+    cached = {}
+    try:
+        cache_file = os.path.join(
+            user_cache_dir("code-health"),
+            hashlib.sha1(directory.encode()).hexdigest() + ".sqlite"
+        )
+        conn = sqlite3.connect(cache_file, timeout=1)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS line_counts"
+            "(path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, lines INTEGER)"
+        )
+        cached = {row[0]: row[1:] for row in conn.execute("SELECT path, mtime_ns, size, lines FROM line_counts")}
+    except (OSError, sqlite3.Error) as e:
+        print(f"Warning: Failed to open line count cache: {e}", file=sys.stderr)
+    
+    counts = {}
+    updates = []
+    for filepath, st in stats.items():
+        key = (st.st_mtime_ns, st.st_size)
+        hit = cached.get(filepath)
+        if hit is not None and hit[:2] == key:
+            counts[filepath] = hit[2]
+            continue
+        counts[filepath] = count_lines(filepath)
+        updates.append((filepath, *key, counts[filepath]))
+    
+    if conn is not None:
+        # Drop entries for files that are gone or no longer counted
+        stale = [(path,) for path in cached.keys() - counts.keys()]
+        try:
+            with conn:
+                conn.executemany("DELETE FROM line_counts WHERE path = ?", stale)
+                conn.executemany("INSERT OR REPLACE INTO line_counts VALUES (?, ?, ?, ?)", updates)
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to write line count cache: {e}", file=sys.stderr)
+        conn.close()
+    
+    return counts
+
+
 # =============================================================================
 # CHECK: Large Files
 # =============================================================================
@@ -174,6 +459,8 @@ def check_size(directory: str, project_type: ProjectType) -> CheckResult:
     }
     
     file_sizes = []
+    to_count = {}
+    small_files = 0
     for pattern in patterns.get(project_type, patterns[ProjectType.UNKNOWN]):
         for filepath in find_files(directory, pattern):
             # Skip test files for size analysis
@@ -181,9 +468,24 @@ def check_size(directory: str, project_type: ProjectType) -> CheckResult:
             if test_pat and test_pat in filepath:
                 continue
             
-            lines = count_lines(filepath)
-            if lines > 0:
-                file_sizes.append((filepath, lines))
+            # Every line takes at least one byte, so a file of 300 bytes or
+            # less cannot exceed 300 lines and is not worth reading
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                continue
+            if st.st_size <= 300:
+                if st.st_size > 0:
+                    small_files += 1
+                continue
+            
+            to_count[filepath] = st
+    
+    line_counts = count_lines_cached(directory, to_count)
+    for filepath in to_count:
+        lines = line_counts[filepath]
+        if lines > 0:
+            file_sizes.append((filepath, lines))
     
     # Sort by size descending
     file_sizes.sort(key=lambda x: x[1], reverse=True)
@@ -222,7 +524,7 @@ def check_size(directory: str, project_type: ProjectType) -> CheckResult:
     # - Python: python scripts/pyfuncs.py --dir <directory>
     # - JS/TS: node scripts/jsfuncs.js --dir <directory>
 
-    total_files = len(file_sizes)
+    total_files = len(file_sizes) + small_files
     large_files = len([f for f in file_sizes if f[1] > 300])
     result.summary = f"Scanned {total_files} files, {large_files} exceed 300 lines"
     result.findings = findings[:15]  # Limit output
@@ -254,14 +556,22 @@ def check_tests(directory: str, project_type: ProjectType) -> CheckResult:
                 # Parse lowest coverage functions
                 lines = out.strip().split("\n")
                 for line in lines[-25:]:
-                    match = re.search(r"(\S+)\s+(\S+)\s+(\d+\.?\d*)%", line)
-                    if match and float(match.group(3)) < 50:
+                    # Lines are "file.go:N:  Func  75.0%", split from the right
+                    parts = line.rsplit(None, 2)
+                    if len(parts) != 3 or not parts[2].endswith("%"):
+                        continue
+                    location, func, percent = parts[0], parts[1], parts[2][:-1]
+                    try:
+                        covered = float(percent)
+                    except ValueError:
+                        continue
+                    if covered < 50:
                         findings.append(Finding(
                             check="tests",
                             severity=Severity.WARNING.value,
-                            file=match.group(1),
+                            file=location,
                             line=None,
-                            message=f"{match.group(2)}: {match.group(3)}% coverage",
+                            message=f"{func}: {percent}% coverage",
                             action="Add test cases"
                         ))
         else:
@@ -276,12 +586,12 @@ def check_tests(directory: str, project_type: ProjectType) -> CheckResult:
         
         # Find source files without corresponding test files
         # Note: For accurate exported function detection, use: go run scripts/gofuncs.go -dir <dir>
+        exported = {f for f, _, _ in grep_go(directory)["func"]}
         for src in source_files:
             test_file = src.replace(".go", "_test.go")
             if test_file not in test_files and not src.endswith("_test.go"):
                 # Only report if file has exported functions (basic regex check)
-                matches = grep_files(r"^func [A-Z]", directory, glob=os.path.basename(src))
-                if any(src in m[0] for m in matches):
+                if src in exported:
                     findings.append(Finding(
                         check="tests",
                         severity=Severity.WARNING.value,
@@ -319,7 +629,7 @@ def check_dupes(directory: str, project_type: ProjectType) -> CheckResult:
 
     if project_type == ProjectType.GO:
         # Check for copy-paste hints
-        hints = grep_files(r"(?i)(copy.?paste|same as|similar to|duplicate)", directory, glob="*.go")
+        hints = grep_go(directory)["dupe"]
         for filepath, line, content in hints[:5]:
             if "vendor/" not in filepath:
                 findings.append(Finding(
@@ -346,7 +656,10 @@ def check_dead(directory: str, project_type: ProjectType) -> CheckResult:
     findings = []
     
     # Legacy markers
-    markers = grep_files(r"(TODO|FIXME|HACK|XXX|deprecated|legacy)", directory, glob="*.go" if project_type == ProjectType.GO else "*")
+    if project_type == ProjectType.GO:
+        markers = grep_go(directory)["legacy"]
+    else:
+        markers = grep_files(_LEGACY_PATTERN, directory, glob="*")
     for filepath, line, content in markers:
         if "vendor/" in filepath or "node_modules/" in filepath:
             continue
@@ -368,7 +681,7 @@ def check_dead(directory: str, project_type: ProjectType) -> CheckResult:
     
     if project_type == ProjectType.GO:
         # Unimplemented panics
-        panics = grep_files(r'panic\("(unimplemented|not implemented|todo)"', directory, glob="*.go")
+        panics = grep_go(directory)["panic"]
         for filepath, line, content in panics:
             if "vendor/" not in filepath:
                 findings.append(Finding(
@@ -385,14 +698,17 @@ def check_dead(directory: str, project_type: ProjectType) -> CheckResult:
             code, out, _ = run_cmd(["staticcheck", "./..."], cwd=directory)
             if out.strip():
                 for line in out.strip().split("\n")[:10]:
-                    match = re.match(r"([^:]+):(\d+):\d+: (.+)", line)
-                    if match:
+                    # Lines are "path:line:col: message"
+                    path, _, rest = line.partition(":")
+                    lnum, _, rest = rest.partition(":")
+                    col, _, msg = rest.partition(": ")
+                    if path and lnum.isdecimal() and col.isdecimal() and msg:
                         findings.append(Finding(
                             check="dead",
                             severity=Severity.WARNING.value,
-                            file=match.group(1),
-                            line=int(match.group(2)),
-                            message=match.group(3)[:80],
+                            file=path,
+                            line=int(lnum),
+                            message=msg[:80],
                             action="Fix staticcheck issue"
                         ))
         else:
@@ -424,47 +740,54 @@ def check_docs(directory: str, project_type: ProjectType) -> CheckResult:
     # - Functions: gofuncs.go, pyfuncs.py, jsfuncs.js for exported API analysis
 
     if project_type == ProjectType.GO:
-        # Exported types without doc comments (basic regex check)
-        type_matches = grep_files(r"^type [A-Z]", directory, glob="*.go", context_before=1)
-        undoc_types = 0
-        for filepath, line, content in type_matches:
+        # Exported types and functions without doc comments (basic regex
+        # check). Only the first 10 of each are reported, so files are
+        # scanned in walk order until both limits are reached.
+        type_findings = []
+        func_findings = []
+        for filepath in find_files(directory, "*.go"):
+            if len(type_findings) >= 10 and len(func_findings) >= 10:
+                break
             if "vendor/" in filepath:
                 continue
-            # Check if previous line is a comment
-            # This is a heuristic - the grep with context would show it
-            if not content.strip().startswith("//"):
-                undoc_types += 1
-                if undoc_types <= 10:
-                    type_name = re.search(r"^type (\w+)", content)
-                    if type_name:
-                        findings.append(Finding(
-                            check="docs",
-                            severity=Severity.WARNING.value,
-                            file=filepath,
-                            line=line,
-                            message=f"Exported type '{type_name.group(1)}' lacks doc comment",
-                            action="Add // TypeName comment"
-                        ))
-        
-        # Exported functions without doc comments
-        func_matches = grep_files(r"^func [A-Z]", directory, glob="*.go", context_before=1)
-        undoc_funcs = 0
-        for filepath, line, content in func_matches:
-            if "vendor/" in filepath or "_test.go" in filepath:
+            try:
+                with open(filepath, "rb") as f:
+                    data = f.read()
+            except OSError:
                 continue
-            if not content.strip().startswith("//"):
-                undoc_funcs += 1
-                if undoc_funcs <= 10:
-                    func_name = re.search(r"^func (\w+)", content)
-                    if func_name:
-                        findings.append(Finding(
-                            check="docs",
-                            severity=Severity.WARNING.value,
-                            file=filepath,
-                            line=line,
-                            message=f"Exported func '{func_name.group(1)}' lacks doc comment",
-                            action="Add // FuncName comment"
-                        ))
+            
+            for line, content in _match_lines(data, _TYPE_DECL_RE):
+                if len(type_findings) >= 10:
+                    break
+                type_name = _TYPE_NAME_RE.search(content)
+                if type_name:
+                    type_findings.append(Finding(
+                        check="docs",
+                        severity=Severity.WARNING.value,
+                        file=filepath,
+                        line=line,
+                        message=f"Exported type '{type_name.group(1)}' lacks doc comment",
+                        action="Add // TypeName comment"
+                    ))
+            
+            if "_test.go" in filepath:
+                continue
+            for line, content in _match_lines(data, _FUNC_DECL_RE):
+                if len(func_findings) >= 10:
+                    break
+                func_name = _FUNC_NAME_RE.search(content)
+                if func_name:
+                    func_findings.append(Finding(
+                        check="docs",
+                        severity=Severity.WARNING.value,
+                        file=filepath,
+                        line=line,
+                        message=f"Exported func '{func_name.group(1)}' lacks doc comment",
+                        action="Add // FuncName comment"
+                    ))
+        
+        findings.extend(type_findings)
+        findings.extend(func_findings)
     
     # Check for README
     readme_path = os.path.join(directory, "README.md")
@@ -499,6 +822,26 @@ def check_docs(directory: str, project_type: ProjectType) -> CheckResult:
 # Main
 # =============================================================================
 
+def run_check(name: str, check, directory: str, project_type: ProjectType) -> CheckResult:
+    """Run a check, adding any warnings raised while it ran as findings."""
+    _check_warnings.messages = []
+    try:
+        result = check(directory, project_type)
+    finally:
+        messages = _check_warnings.messages
+        _check_warnings.messages = None
+    for message in dict.fromkeys(messages):
+        result.findings.append(Finding(
+            check=name,
+            severity=Severity.WARNING.value,
+            file="",
+            line=None,
+            message=message,
+            action="Results may be incomplete"
+        ))
+    return result
+
+
 def print_report(report: HealthReport, json_output: bool = False):
     """Print the health report."""
     if json_output:
@@ -515,7 +858,10 @@ def print_report(report: HealthReport, json_output: bool = False):
                 "error": check.error,
                 "findings": [f.to_dict() for f in check.findings]
             })
-        print(json.dumps(output, indent=2))
+        if orjson is not None:
+            print(orjson.dumps(output, option=orjson.OPT_INDENT_2).decode())
+        else:
+            print(json.dumps(output, indent=2, ensure_ascii=False))
         return
     
     severity_icons = {
@@ -577,7 +923,7 @@ def main():
     )
     
     # Check for recommended tools
-    for tool in ["rg", "fd", "git"]:
+    for tool in ["rg", "git"]:
         if not has_tool(tool):
             report.tools_missing.append(tool)
     
@@ -599,12 +945,15 @@ def main():
     else:
         checks_to_run = list(checks.keys())
     
-    for name in checks_to_run:
-        try:
-            result = checks[name](directory, project_type)
-            report.checks.append(result)
-        except Exception as e:
-            report.checks.append(CheckResult(name=name, error=str(e)))
+    # Checks mostly wait on subprocesses, so run them concurrently and
+    # collect the results in the order they were requested
+    with ThreadPoolExecutor(max_workers=min(len(checks_to_run), 8)) as executor:
+        futures = [executor.submit(run_check, name, checks[name], directory, project_type) for name in checks_to_run]
+        for name, future in zip(checks_to_run, futures):
+            try:
+                report.checks.append(future.result())
+            except Exception as e:
+                report.checks.append(CheckResult(name=name, error=str(e)))
     
     print_report(report, json_output=args.json)
 